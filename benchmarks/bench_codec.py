@@ -0,0 +1,225 @@
+"""Benchmark bytes and CPU time of one vehicle data refresh.
+
+Uses a response with exactly the fields build_vehicles_query() requests, or
+a captured one. Reports the transferred size and the time to decompress it
+for each content encoding aiohttp can negotiate by default (br and zstd only
+with their decoders installed), and the time to encode the request and
+decode the response with the stdlib json module and with orjson (if
+installed).
+
+aiohttp negotiated the same compression before, so only the JSON codec
+differs from the baseline. Decompression costs the same with either codec.
+
+Run from the repository root:
+
+    python benchmarks/bench_codec.py [--vehicles 3] [--rounds 200] [response.json]
+"""
+
+import argparse
+import gzip
+import json
+from pathlib import Path
+import random
+import sys
+import timeit
+import zlib
+
+sys.path.insert(
+    0, str(Path(__file__).parent.parent / "custom_components" / "connectedcars_io")
+)
+
+from minvw.minvw import VEHICLE_FIELDS, build_vehicles_query
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LAMP_TYPES = (
+    "engine",
+    "oil",
+    "coolant",
+    "brake",
+    "abs",
+    "airbag",
+    "tirePressure",
+    "battery",
+    "glowPlug",
+    "esc",
+)
+
+
+def synthetic_vehicle(vehicle_id, rng):
+    """Build a vehicle node with the fields of the User query."""
+
+    def time():
+        return (
+            f"2024-05-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:"
+            f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}."
+            f"{rng.randint(0, 999):03d}Z"
+        )
+
+    def date():
+        return f"2024-{rng.randint(6, 12):02d}-{rng.randint(1, 28):02d}"
+
+    liters = round(rng.uniform(5, 50), 1)
+    vehicle = {
+        "id": vehicle_id,
+        "position": {
+            "latitude": round(rng.uniform(54.5, 57.5), 6),
+            "longitude": round(rng.uniform(8.0, 12.7), 6),
+            "speed": 0,
+            "direction": rng.randint(0, 359),
+            "time": time(),
+        },
+        "ignition": {"time": time(), "on": False},
+        "odometer": {"odometer": rng.randint(5000, 250000), "time": time()},
+        "fuelEconomy": round(rng.uniform(12, 24), 1),
+        "fuelLevel": {"time": time(), "liter": liters},
+        "refuelEvents": [
+            {
+                "litersBefore": round(liters / 4, 1),
+                "litersAfter": liters,
+                "time": time(),
+            }
+        ],
+        "fuelPercentage": {"percent": rng.randint(5, 100), "time": time()},
+        "adblueRemainingKm": [{"km": rng.randint(500, 9000)}],
+        "chargePercentage": None,
+        "highVoltageBatteryTemperature": None,
+        "rangeTotalKm": {"km": rng.randint(50, 900), "time": time()},
+        "outdoorTemperatures": [
+            {"celsius": round(rng.uniform(-5, 25), 1), "time": time()}
+        ],
+        "latestBatteryVoltage": {
+            "voltage": round(rng.uniform(11.8, 12.9), 2),
+            "time": time(),
+        },
+        "health": {"ok": rng.random() > 0.1},
+        "odometerOffset": 0,
+        "vin": f"WVWZZZ1KZ{rng.randint(0, 10**8 - 1):08d}",
+        "licensePlate": f"{rng.choice('ABCDEFGH')}{rng.randint(10000, 99999)}",
+        "name": f"Car {vehicle_id}",
+        "brand": "Volkswagen",
+        "make": "Volkswagen",
+        "model": rng.choice(("Golf", "Polo", "Passat", "Tiguan")),
+        "year": rng.randint(2012, 2024),
+        "engineSize": rng.choice((1.0, 1.4, 1.5, 2.0)),
+        "avgCO2EmissionKm": rng.randint(90, 160),
+        "fuelType": rng.choice(("Petrol", "Diesel")),
+        "fuelTankSize": rng.choice((40, 45, 50, 55)),
+        "lampStates": [
+            {"type": lamp_type, "time": time(), "enabled": rng.random() < 0.1}
+            for lamp_type in LAMP_TYPES
+        ],
+        "service": {"predictedDate": date()},
+        "leads": [
+            {
+                "type": "service_reminder",
+                "status": "open",
+                "severityScore": rng.randint(1, 100),
+                "value": {"amount": rng.randint(500, 5000), "currency": "DKK"},
+                "createdTime": time(),
+                "updatedTime": time(),
+                "lastActivityTime": time(),
+                "bookingTime": None,
+                "lastContactedTime": None,
+                "context": {
+                    "serviceDate": date(),
+                    "oilEstimateUncertain": rng.random() < 0.5,
+                    "sourceData": [
+                        {"type": "oilService", "value": str(rng.randint(100, 700))},
+                        {"type": "inspection", "value": str(rng.randint(100, 700))},
+                    ],
+                },
+            }
+            for _ in range(rng.randint(0, 2))
+        ],
+    }
+    # Keep the payload in step with the query
+    assert vehicle.keys() == {"id", *VEHICLE_FIELDS}, "update synthetic_vehicle"
+    return vehicle
+
+
+def measure(func, rounds):
+    """Get mean seconds per call."""
+    return timeit.timeit(func, number=rounds) / rounds
+
+
+def encodings():
+    """Get content encodings aiohttp negotiates by default, with their codecs."""
+    ret = {
+        "identity": (lambda raw: raw, lambda body: body),
+        "gzip": (gzip.compress, gzip.decompress),
+        "deflate": (zlib.compress, zlib.decompress),
+    }
+    if brotli is not None:
+        ret["br"] = (brotli.compress, brotli.decompress)
+    if zstandard is not None:
+        ret["zstd"] = (
+            zstandard.ZstdCompressor().compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    return ret
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("response", nargs="?", type=Path)
+    parser.add_argument("--vehicles", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.response is not None:
+        raw = args.response.read_bytes()
+    else:
+        rng = random.Random(1)
+        vehicles = [
+            {"primary": index == 0, "vehicle": synthetic_vehicle(index, rng)}
+            for index in range(args.vehicles)
+        ]
+        raw = json.dumps({"data": {"viewer": {"vehicles": vehicles}}}).encode()
+
+    print("Response per refresh, by content encoding")
+    for name, (compress, decompress) in encodings().items():
+        body = compress(raw)
+        seconds = measure(lambda: decompress(body), args.rounds)
+        print(
+            f"  {name:9} {len(body):>9} bytes, decompress {seconds * 1e6:9.1f} us"
+        )
+    if brotli is None:
+        print("  br        not installed")
+    if zstandard is None:
+        print("  zstd      not installed")
+
+    query = build_vehicles_query()
+    print("\nJSON CPU time per refresh")
+    stdlib_encode = measure(lambda: json.dumps({"query": query}).encode(), args.rounds)
+    stdlib_decode = measure(lambda: json.loads(raw), args.rounds)
+    print(f"  json encode request:    {stdlib_encode * 1e6:9.1f} us")
+    print(f"  json decode response:   {stdlib_decode * 1e6:9.1f} us")
+    if orjson is not None:
+        fast_decode = measure(lambda: orjson.loads(raw), args.rounds)
+        print(f"  orjson decode response: {fast_decode * 1e6:9.1f} us")
+        print(
+            "  saved per refresh:      "
+            f"{(stdlib_encode + stdlib_decode - fast_decode) * 1e6:9.1f} us"
+            " (request body is encoded once and reused)"
+        )
+    else:
+        print("  orjson:                 not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,32 @@
 """Support for connectedcars.io / Min Volkswagen integration."""
 
+from datetime import timedelta
 import logging
 
 from homeassistant import config_entries, core
-
-from .const import CONF_HEALTH_SENSITIVITY, DOMAIN
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CONF_HEALTH_SENSITIVITY,
+    CONF_MAX_STALENESS,
+    DEFAULT_MAX_STALENESS,
+    DOMAIN,
+    REQUEST_CACHE_TTL,
+)
+from .coordinator import ConnectedCarsDataUpdateCoordinator
 from .minvw import MinVW
+from .statistics import (
+    BACKFILL_STATISTICS_SCHEMA,
+    SERVICE_BACKFILL_STATISTICS,
+    async_handle_backfill_statistics,
+)
+from .storage import (
+    AccessTokenStore,
+    VehicleDataStore,
+    async_remove_stores,
+    trip_store_path,
+)
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = ["binary_sensor", "device_tracker", "sensor"]
@@ -22,11 +43,70 @@ async def async_setup_entry(
     data["email"] = entry.data["email"]
     data["password"] = entry.data["password"]
     data["namespace"] = entry.data["namespace"]
+    max_staleness = entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
     data["connectedcarsclient"] = MinVW(
-        entry.data["email"], entry.data["password"], entry.data["namespace"]
+        entry.data["email"],
+        entry.data["password"],
+        entry.data["namespace"],
+        async_get_clientsession(hass),
+        timedelta(minutes=max_staleness) if max_staleness > 0 else None,
+        timedelta(seconds=REQUEST_CACHE_TTL),
+        trip_store_path=trip_store_path(hass, entry.entry_id),
     )
     data[CONF_HEALTH_SENSITIVITY] = entry.options.get(CONF_HEALTH_SENSITIVITY, "medium")
 
+    # Reuse the access token across restarts and renew it in the background
+    token_store = AccessTokenStore(hass, entry, data["connectedcarsclient"])
+    await token_store.async_load()
+    entry.async_on_unload(token_store.async_unload)
+
+    # One coordinator per entry fetches vehicle data and pushes it to all entities
+    coordinator = ConnectedCarsDataUpdateCoordinator(
+        hass, entry, data["connectedcarsclient"]
+    )
+
+    # Start from the last stored vehicle data and refresh it in the background,
+    # so entities are created without waiting for the API
+    vehicle_data_store = VehicleDataStore(hass, entry, data["connectedcarsclient"])
+    restored = await vehicle_data_store.async_load()
+    if restored is not None:
+        coordinator.async_set_updated_data(restored)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} warm start refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+    data["coordinator"] = coordinator
+
+    saved_data = None
+
+    @callback
+    def save_vehicle_data():
+        nonlocal saved_data
+        if not coordinator.last_update_success or coordinator.data is saved_data:
+            return
+        saved_data = coordinator.data
+        # Entities were created for the restored vehicles, recreate them if
+        # live data has other vehicles or other data available
+        if data["connectedcarsclient"].restored_vehicle_instances_changed():
+            _LOGGER.info("Vehicles changed since last stored, reloading")
+            hass.async_create_task(reload_with_vehicle_data())
+            return
+        vehicle_data_store.async_schedule_save()
+
+    async def reload_with_vehicle_data():
+        await vehicle_data_store.async_save()
+        await hass.config_entries.async_reload(entry.entry_id)
+
+    entry.async_on_unload(coordinator.async_add_listener(save_vehicle_data))
+
+    # Push data refreshed in the background (stale-while-revalidate) right away
+    entry.async_on_unload(
+        data["connectedcarsclient"].add_refresh_listener(
+            coordinator.async_set_updated_data
+        )
+    )
+
     # Registers update listener to update config entry when options are updated, and store a reference to the unsubscribe function
     data["unsub_options_update_listener"] = entry.add_update_listener(
         options_update_listener
@@ -43,6 +123,12 @@ async def async_setup_entry(
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the GitHub Custom component from yaml configuration."""
     hass.data.setdefault(DOMAIN, {})
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL_STATISTICS,
+        async_handle_backfill_statistics,
+        schema=BACKFILL_STATISTICS_SCHEMA,
+    )
     return True
 
 
@@ -53,6 +139,13 @@ async def options_update_listener(
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
+async def async_remove_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Remove data stored for a config entry."""
+    await async_remove_stores(hass, entry.entry_id)
+
+
 async def async_unload_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
@@ -71,6 +164,7 @@ async def async_unload_entry(
 
     # Remove config entry from domain.
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        await data["connectedcarsclient"].close()
 
     return unload_ok
@@ -1,20 +1,26 @@
 """Support for connectedcars.io / Min Volkswagen integration."""
 
-from datetime import timedelta
 import logging
 import traceback
 
 from homeassistant import config_entries, core
 from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.core import callback
 
 # ,  BinarySensorEntityDescription
 from homeassistant.exceptions import PlatformNotReady
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import CONF_HEALTH_SENSITIVITY, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=1)
+# Vehicle fields read by each binary sensor
+ITEM_FIELDS = {
+    "Ignition": ("ignition",),
+    "Health": ("health", "leads"),
+    "Lamp": ("lampStates",),
+}
 
 
 async def async_setup_entry(
@@ -26,6 +32,7 @@ async def async_setup_entry(
     config = hass.data[DOMAIN][config_entry.entry_id]
 
     _connectedcarsclient = config["connectedcarsclient"]
+    _coordinator = config["coordinator"]
 
     try:
         sensors = []
@@ -34,7 +41,13 @@ async def async_setup_entry(
             if "Ignition" in vehicle["has"]:
                 sensors.append(
                     CcBinaryEntity(
-                        vehicle, "Ignition", "", "moving", True, _connectedcarsclient
+                        vehicle,
+                        "Ignition",
+                        "",
+                        "moving",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
             if "Health" in vehicle["has"]:
@@ -46,6 +59,7 @@ async def async_setup_entry(
                         "problem",
                         True,
                         _connectedcarsclient,
+                        _coordinator,
                         config[CONF_HEALTH_SENSITIVITY],
                     )
                 )
@@ -58,6 +72,7 @@ async def async_setup_entry(
                         "problem",
                         False,
                         _connectedcarsclient,
+                        _coordinator,
                     )
                 )
         async_add_entities(sensors, update_before_add=True)
@@ -68,7 +83,7 @@ async def async_setup_entry(
         raise PlatformNotReady from err
 
 
-class CcBinaryEntity(BinarySensorEntity):
+class CcBinaryEntity(CoordinatorEntity, BinarySensorEntity):
     """Representation of a BinaryEntity."""
 
     def __init__(
@@ -79,9 +94,15 @@ class CcBinaryEntity(BinarySensorEntity):
         device_class,
         entity_registry_enabled_default,
         connectedcarsclient,
+        coordinator,
         sensitivity=None,
     ) -> None:
         """Initialize the sensor."""
+        # Updated only when the vehicle fields read by the sensor change
+        super().__init__(
+            coordinator,
+            frozenset((vehicle["id"], field) for field in ITEM_FIELDS[itemName]),
+        )
         self._vehicle = vehicle
         self._itemName = itemName
         self._subitemName = subitemName
@@ -146,7 +167,7 @@ class CcBinaryEntity(BinarySensorEntity):
     @property
     def available(self):
         """Availability."""
-        return self._is_on is not None
+        return super().available and self._is_on is not None
 
     @property
     def device_class(self):
@@ -162,22 +183,36 @@ class CcBinaryEntity(BinarySensorEntity):
         attributes.update(self._dict)
         return attributes
 
+    async def async_added_to_hass(self) -> None:
+        """Request the vehicle fields of this sensor."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_request_fields(ITEM_FIELDS[self._itemName])
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data pushed from the coordinator."""
+        self._update_state()
+        self.async_write_ha_state()
+
     async def async_update(self):
         """Update data."""
+        self._update_state()
+
+    def _update_state(self):
+        """Update state from the most recently read vehicle data."""
         self._is_on = None
         try:
             if self._itemName == "Ignition":
+                vehicle = self._connectedcarsclient.get_cached_vehicle_state(
+                    self._vehicle["id"]
+                )
                 self._is_on = (
-                    str(
-                        await self._connectedcarsclient.get_value(
-                            self._vehicle["id"], ["ignition", "on"]
-                        )
-                    ).lower()
+                    str(vehicle.ignition_on if vehicle is not None else None).lower()
                     == "true"
                 )
-                self._updated = await self._connectedcarsclient.get_value(
-                    self._vehicle["id"], ["ignition", "time"]
-                )
+                self._updated = vehicle.ignition_time if vehicle is not None else None
             elif self._itemName == "Health":
                 # self._is_on = (
                 #     str(
@@ -187,14 +222,16 @@ class CcBinaryEntity(BinarySensorEntity):
                 #     ).lower()
                 #     != "true"
                 # )
-                self._dict["Leads"] = await self._connectedcarsclient.get_leads(
+                self._dict["Leads"] = self._connectedcarsclient.get_cached_leads(
                     self._vehicle["id"]
                 )
                 self._is_on = self.evaluate_health()
 
             elif self._itemName == "Lamp":
-                enabled, self._updated = await self._connectedcarsclient.get_lampstatus(
-                    self._vehicle["id"], self._subitemName
+                enabled, self._updated = (
+                    self._connectedcarsclient.get_cached_lampstatus(
+                        self._vehicle["id"], self._subitemName
+                    )
                 )
                 self._is_on = str(enabled).lower() == "true"
 
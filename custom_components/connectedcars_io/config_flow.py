@@ -11,7 +11,12 @@ import homeassistant.helpers.selector as selector
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 
-from .const import DOMAIN, CONF_HEALTH_SENSITIVITY
+from .const import (
+    DOMAIN,
+    CONF_HEALTH_SENSITIVITY,
+    CONF_MAX_STALENESS,
+    DEFAULT_MAX_STALENESS,
+)
 from .minvw import MinVW
 
 _LOGGER = logging.getLogger(__name__)
@@ -54,6 +59,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     user_input[CONF_EMAIL],
                     user_input[CONF_PASSWORD],
                     user_input["namespace"],
+                    async_get_clientsession(self.hass),
                 )
                 token = await client._get_access_token()
 
@@ -111,6 +117,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             if not errors:
                 options = {}
                 options[CONF_HEALTH_SENSITIVITY] = user_input[CONF_HEALTH_SENSITIVITY]
+                options[CONF_MAX_STALENESS] = int(user_input[CONF_MAX_STALENESS])
 
                 return self.async_create_entry(title="", data=options)
 
@@ -133,6 +140,20 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         translation_key=CONF_HEALTH_SENSITIVITY,
                     ),
                 ),
+                vol.Required(
+                    CONF_MAX_STALENESS,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+                    ),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0,
+                        max=60,
+                        step=1,
+                        unit_of_measurement="min",
+                        mode=selector.NumberSelectorMode.BOX,
+                    ),
+                ),
             }
         )
         return self.async_show_form(
@@ -2,3 +2,6 @@
 
 DOMAIN = "connectedcars_io"
 CONF_HEALTH_SENSITIVITY = "health_sensitivity"
+CONF_MAX_STALENESS = "max_staleness"
+DEFAULT_MAX_STALENESS = 10  # minutes
+REQUEST_CACHE_TTL = 30  # seconds
@@ -0,0 +1,93 @@
+"""Support for connectedcars.io / Min Volkswagen integration."""
+
+from collections import Counter
+from datetime import timedelta
+import logging
+
+from homeassistant import config_entries, core
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN
+from .minvw import MinVW
+from .minvw.diff import diff_vehicle_data
+
+_LOGGER = logging.getLogger(__name__)
+
+UPDATE_INTERVAL = timedelta(minutes=1)
+
+
+class ConnectedCarsDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch vehicle data once per cycle and push it to all entities."""
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        entry: config_entries.ConfigEntry,
+        connectedcarsclient: MinVW,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name=DOMAIN,
+            update_interval=UPDATE_INTERVAL,
+        )
+        self.connectedcarsclient = connectedcarsclient
+        self._requested_fields = Counter()
+        self._notified_data = None
+        self._notified_success = True
+
+    @callback
+    def async_request_fields(self, fields):
+        """Register vehicle fields used by an entity.
+
+        Only fields of entities added to Home Assistant are requested, so
+        disabled entities cost nothing. Returns a function to unregister them.
+        """
+        self._requested_fields.update(fields)
+        self.connectedcarsclient.set_requested_fields(+self._requested_fields)
+
+        @callback
+        def remove_fields():
+            self._requested_fields.subtract(fields)
+            self.connectedcarsclient.set_requested_fields(+self._requested_fields)
+
+        return remove_fields
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners of changed vehicle fields only.
+
+        Listeners added with a context of (vehicle id, field) pairs are called
+        when any of those fields changed since listeners were last updated.
+        Listeners without context, and all listeners after a failed update or
+        the first one after it, are always called.
+        """
+        changes = None
+        if self.last_update_success and self._notified_success:
+            changes = diff_vehicle_data(self._notified_data, self.data)
+        self._notified_success = self.last_update_success
+        if self.last_update_success:
+            self._notified_data = self.data
+
+        if changes is None:
+            super().async_update_listeners()
+            return
+
+        _LOGGER.debug("Changed vehicle fields: %s", sorted(changes, key=str))
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or not changes.isdisjoint(context):
+                update_callback()
+
+    async def _async_update_data(self):
+        """Fetch vehicle data from API.
+
+        The client decides itself whether its cached data is still fresh, so
+        this is a cheap call while the cache has not expired.
+        """
+        try:
+            return await self.connectedcarsclient._get_vehicle_data()
+        except Exception as err:
+            raise UpdateFailed(f"Failed to get vehicle data: {err}") from err
@@ -1,18 +1,20 @@
 """Support for connectedcars.io / Min Volkswagen integration."""
 
-from datetime import datetime, timedelta
 import logging
 import traceback
 
 from homeassistant import config_entries, core
 from homeassistant.components.device_tracker.config_entry import TrackerEntity
+from homeassistant.core import callback
 from homeassistant.exceptions import PlatformNotReady
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=1)
+# Vehicle fields read by the tracker
+TRACKER_FIELDS = ("ignition", "position")
 
 
 async def async_setup_entry(
@@ -24,6 +26,7 @@ async def async_setup_entry(
     config = hass.data[DOMAIN][config_entry.entry_id]
 
     _connectedcarsclient = config["connectedcarsclient"]
+    _coordinator = config["coordinator"]
 
     try:
         sensors = []
@@ -31,7 +34,9 @@ async def async_setup_entry(
         for vehicle in data:
             if "GeoLocation" in vehicle["has"]:
                 sensors.append(
-                    CcTrackerEntity(vehicle, "GeoLocation", _connectedcarsclient)
+                    CcTrackerEntity(
+                        vehicle, "GeoLocation", _connectedcarsclient, _coordinator
+                    )
                 )
         async_add_entities(sensors, update_before_add=True)
 
@@ -41,10 +46,15 @@ async def async_setup_entry(
         raise PlatformNotReady from err
 
 
-class CcTrackerEntity(TrackerEntity):
+class CcTrackerEntity(CoordinatorEntity, TrackerEntity):
     """Representation of a Device TrackerEntity."""
 
-    def __init__(self, vehicle, itemName, connectedcarsclient) -> None:
+    def __init__(self, vehicle, itemName, connectedcarsclient, coordinator) -> None:
+        # Updated only when the vehicle fields read by the tracker change
+        super().__init__(
+            coordinator,
+            frozenset((vehicle["id"], field) for field in TRACKER_FIELDS),
+        )
         self._vehicle = vehicle
         self._itemName = itemName
         self._icon = "mdi:map"
@@ -117,18 +127,17 @@ class CcTrackerEntity(TrackerEntity):
     @property
     def available(self):
         """Availability."""
-        return self._latitude is not None and self._longitude is not None
+        return (
+            super().available
+            and self._latitude is not None
+            and self._longitude is not None
+        )
 
     @property
     def device_class(self):
         """Device class."""
         return self._device_class
 
-    @property
-    def should_poll(self) -> bool:
-        """No polling for entities that have location pushed."""
-        return True
-
     # @property
     # def state(self):
     #     _LOGGER.debug(f"zone_state...")
@@ -156,39 +165,37 @@ class CcTrackerEntity(TrackerEntity):
             attributes["Updated"] = self._updated
         return attributes
 
+    async def async_added_to_hass(self) -> None:
+        """Request the vehicle fields used for location."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_request_fields(TRACKER_FIELDS))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data pushed from the coordinator."""
+        self._update_state()
+        self.async_write_ha_state()
+
     async def async_update(self):
         """Update data."""
+        self._update_state()
+
+    def _update_state(self):
+        """Update location from the most recently read vehicle data."""
         self._latitude = None
         self._longitude = None
         try:
-            ignition = (
-                str(
-                    await self._connectedcarsclient.get_value(
-                        self._vehicle["id"], ["ignition", "on"]
-                    )
-                ).lower()
-                == "true"
+            vehicle = self._connectedcarsclient.get_cached_vehicle_state(
+                self._vehicle["id"]
             )
-            ignition_time = None
-            timestamp = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["ignition", "time"]
-            )
-            if is_date_valid(timestamp):
-                ignition_time = datetime.fromisoformat(
-                    str(timestamp).replace("Z", "+00:00")
-                )
+            if vehicle is None:
+                return
+            ignition = str(vehicle.ignition_on).lower() == "true"
+            ignition_time = vehicle.ignition_changed
             _LOGGER.debug("ignition: %s, time: %s", ignition, ignition_time)
 
-            latitude = await self._connectedcarsclient.get_value_float(
-                self._vehicle["id"], ["position", "latitude"]
-            )
-            longitude = await self._connectedcarsclient.get_value_float(
-                self._vehicle["id"], ["position", "longitude"]
-            )
-            postime = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["position", "time"]
-            )
-            position = tuple((latitude, longitude))
+            postime = vehicle.position_time
+            position = tuple((vehicle.latitude, vehicle.longitude))
 
             if ignition:
                 self._cached_location = None
@@ -215,16 +222,3 @@ class CcTrackerEntity(TrackerEntity):
         except Exception as err:  # pylint: disable=broad-except
             _LOGGER.debug("Unable to get vehicle location: %s", err)
 
-
-def is_date_valid(date) -> bool:
-    """Check if date is valid."""
-    valid_date = True
-    try:
-        valid_date = (
-            False
-            if (date is None)
-            else bool(datetime.strptime(date, "%Y-%m-%dT%H:%M:%S.%f%z"))
-        )
-    except ValueError:
-        valid_date = False
-    return valid_date
@@ -2,4 +2,4 @@
 
 from .minvw import MinVW
 
-__version__ = '0.1.0'
+__version__ = "0.1.0"
@@ -0,0 +1,152 @@
+"""Rolling-window trip totals of connectedcars.io vehicles."""
+
+from datetime import UTC, datetime
+
+from .freshness import parse_time
+
+
+def parse_trip(start_time, end_time, mileage):
+    """Parse a trip to (start, duration in minutes, mileage), None if invalid."""
+    start = parse_time(start_time) if start_time is not None else None
+    end = parse_time(end_time) if end_time is not None else None
+    if start is None or end is None:
+        return None
+    return (
+        start.astimezone(UTC),
+        max(0.0, (end - start).total_seconds() / 60),
+        mileage or 0.0,
+    )
+
+
+def _max(first, second):
+    """Get the larger value, ignoring None."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+class TripAggregates:
+    """Totals of the trips of one vehicle, for any window.
+
+    Trips are bucketed by UTC day. Prefix sums of the daily totals answer
+    the whole days of a window in constant time, and a sparse table of the
+    daily longest trips answers their maximum in constant time. Only the
+    trips of the two partial days at the window's ends are scanned. Adding
+    trips only recomputes the prefix sums and the sparse table entries from
+    the earliest day changed, usually just today.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._first_day = None
+        self._days = []
+        self._seen = set()
+        self._prefix = [(0.0, 0.0, 0)]
+        self._sparse = [[]]
+        self._dirty_from = None
+
+    def add(self, trips):
+        """Add trips parsed with parse_trip, skipping those already added."""
+        for trip in trips:
+            if trip is None or trip[0] in self._seen:
+                continue
+            self._seen.add(trip[0])
+            day = trip[0].toordinal()
+            if self._first_day is None:
+                self._first_day = day
+            elif day < self._first_day:
+                self._days[0:0] = [[] for _ in range(self._first_day - day)]
+                self._prefix = [(0.0, 0.0, 0)]
+                self._first_day = day
+            index = day - self._first_day
+            while len(self._days) <= index:
+                self._days.append([])
+            self._days[index].append(trip)
+            if self._dirty_from is None or index < self._dirty_from:
+                self._dirty_from = index
+        if self._dirty_from is not None:
+            self._dirty_from = min(self._dirty_from, len(self._prefix) - 1)
+
+    def _update(self):
+        """Recompute prefix sums and the sparse table after trips were added."""
+        if self._dirty_from is None:
+            return
+        prefix = self._prefix[: self._dirty_from + 1]
+        for trips in self._days[self._dirty_from :]:
+            duration, mileage, count = prefix[-1]
+            prefix.append(
+                (
+                    duration + sum(trip[1] for trip in trips),
+                    mileage + sum(trip[2] for trip in trips),
+                    count + len(trips),
+                )
+            )
+        self._prefix = prefix
+
+        # Row k holds the longest trip of the 2**k days from each index. Only
+        # entries whose days reach the earliest day changed are recomputed.
+        sparse = self._sparse
+        sparse[0][self._dirty_from :] = [
+            max((trip[2] for trip in trips), default=None)
+            for trips in self._days[self._dirty_from :]
+        ]
+        level, width = 1, 1
+        while width * 2 <= len(self._days):
+            row = sparse[level - 1]
+            if level == len(sparse):
+                sparse.append([])
+                start = 0
+            else:
+                start = max(0, self._dirty_from - 2 * width + 1)
+            sparse[level][start:] = [
+                _max(row[index], row[index + width])
+                for index in range(start, len(row) - width)
+            ]
+            level += 1
+            width *= 2
+        self._dirty_from = None
+
+    def _longest(self, first_index, last_index):
+        """Get the longest trip of whole days first_index to last_index."""
+        level = (last_index - first_index + 1).bit_length() - 1
+        row = self._sparse[level]
+        return _max(row[first_index], row[last_index - (1 << level) + 1])
+
+    def statistics(self, first: datetime, last: datetime) -> dict:
+        """Get totals of trips starting within a period, like the API's."""
+        self._update()
+        duration, mileage, count, longest = 0.0, 0.0, 0, None
+
+        if self._first_day is not None:
+            first = first.astimezone(UTC)
+            last = last.astimezone(UTC)
+            first_index = first.toordinal() - self._first_day
+            last_index = last.toordinal() - self._first_day
+
+            # Whole days in between
+            start = max(first_index + 1, 0)
+            end = min(last_index - 1, len(self._days) - 1)
+            if start <= end:
+                duration = self._prefix[end + 1][0] - self._prefix[start][0]
+                mileage = self._prefix[end + 1][1] - self._prefix[start][1]
+                count = self._prefix[end + 1][2] - self._prefix[start][2]
+                longest = self._longest(start, end)
+
+            # Partial days at both ends
+            for index in {first_index, last_index}:
+                if 0 <= index < len(self._days):
+                    for trip in self._days[index]:
+                        if first <= trip[0] <= last:
+                            duration += trip[1]
+                            mileage += trip[2]
+                            count += 1
+                            longest = _max(longest, trip[2])
+
+        return {
+            "mileageInKm": mileage,
+            "driveDurationInMinutes": duration,
+            "numberTrips": count,
+            "longestMileageInKm": longest,
+        }
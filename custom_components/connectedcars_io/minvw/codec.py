@@ -0,0 +1,32 @@
+"""Encoding of connectedcars.io API requests and responses."""
+
+from functools import lru_cache
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """Encode JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def loads(data: bytes):
+    """Decode JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=64)
+def encode_query(query: str) -> bytes:
+    """Encode the body of a GraphQL query.
+
+    Most query texts repeat every refresh, so their body is encoded once.
+    """
+    return dumps({"query": query})
@@ -0,0 +1,39 @@
+"""Changes between reads of connectedcars.io vehicle data."""
+
+from .model import FIELD_ATTRIBUTES
+
+
+def diff_vehicle_data(old, new):
+    """Find vehicle fields changed between two reads of vehicle states by id.
+
+    Returns a frozenset of (vehicle id, field) for vehicle fields of the API,
+    or None when everything must be considered changed, i.e. without
+    previous data or when vehicles were added or removed. Vehicles not read
+    again keep their state, so they are skipped by identity before comparing
+    values. Fields carrying their own source time are only changed when that
+    time has advanced.
+    """
+    if old is None or new is None:
+        return None
+    if old is new:
+        return frozenset()
+    if old.keys() != new.keys():
+        return None
+
+    changes = set()
+    for vehicle_id, vehicle in new.items():
+        previous = old[vehicle_id]
+        if vehicle is previous:
+            continue
+        for field, attributes in FIELD_ATTRIBUTES.items():
+            time = vehicle.field_times.get(field)
+            previous_time = previous.field_times.get(field)
+            if time is not None and previous_time is not None:
+                if time > previous_time:
+                    changes.add((vehicle_id, field))
+            elif any(
+                getattr(vehicle, attribute) != getattr(previous, attribute)
+                for attribute in attributes
+            ):
+                changes.add((vehicle_id, field))
+    return frozenset(changes)
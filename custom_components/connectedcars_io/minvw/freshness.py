@@ -0,0 +1,61 @@
+"""Freshness of connectedcars.io vehicle fields."""
+
+from datetime import UTC, datetime, timedelta
+
+
+def parse_time(text):
+    """Parse a time of the API, None if invalid."""
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def has_advanced(time, previous_time) -> bool:
+    """Check if a source time is newer than the previous one."""
+    if time == previous_time:
+        return False
+    parsed = parse_time(time)
+    previous_parsed = parse_time(previous_time)
+    if parsed is None or previous_parsed is None:
+        return True
+    return parsed > previous_parsed
+
+
+class FieldFreshness:
+    """Track the latest source time observed for each vehicle field."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._times = {}
+
+    def observe(self, vehicles):
+        """Record source times of vehicle states, indexed by vehicle id.
+
+        Times of fields not read again, or not advanced, are kept.
+        """
+        times = {}
+        for vehicle_id, vehicle in vehicles.items():
+            vehicle_times = dict(self._times.get(vehicle_id, {}))
+            for field, time in vehicle.field_times.items():
+                previous = vehicle_times.get(field)
+                if previous is None or time > previous:
+                    vehicle_times[field] = time
+            times[vehicle_id] = vehicle_times
+        # Forget vehicles no longer on the account
+        self._times = times
+
+    def get_time(self, vehicle_id, field) -> datetime | None:
+        """Get the latest source time of a field."""
+        return self._times.get(vehicle_id, {}).get(field)
+
+    def get_times(self, vehicle_id) -> dict:
+        """Get the latest source time of each field of a vehicle."""
+        return dict(self._times.get(vehicle_id, {}))
+
+    def get_age(self, vehicle_id, field, now: datetime = None) -> timedelta | None:
+        """Get time since a field was last measured."""
+        time = self.get_time(vehicle_id, field)
+        if time is None:
+            return None
+        return (now or datetime.now(UTC)) - time
@@ -0,0 +1,117 @@
+"""Fuel economy of connectedcars.io vehicles."""
+
+from collections import deque
+
+from .freshness import has_advanced
+
+# Completed tanks kept, and averaged for the rolling economy
+TANK_HISTORY = 10
+ROLLING_TANKS = 3
+
+# Fuel used below this is too close to level sensor noise for an economy
+MIN_LITERS = 1.0
+
+
+def _economy(distance, liters):
+    """Get km/l, None if too little fuel was used."""
+    if distance is None or liters is None or liters < MIN_LITERS:
+        return None
+    return distance / liters
+
+
+class FuelEconomy:
+    """Fuel economy of one vehicle, updated from each snapshot.
+
+    A tank runs from one refuel event to the next. Its fuel is the liters
+    after the first refuel minus the liters before the next, and its
+    distance the difference of the odometer at both. The current tank uses
+    the fuel level and odometer instead. Only totals are kept, so no trips
+    or history are requested.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # Latest refuel event as (time, liters after, odometer)
+        self._refuel = None
+        self._current = None
+        self._tanks = deque(maxlen=TANK_HISTORY)
+        self._tank_count = 0
+        self._distance = 0.0
+        self._liters = 0.0
+
+    def is_new_refuel(self, time) -> bool:
+        """Check if a refuel event time is newer than the latest one."""
+        return time is not None and (
+            self._refuel is None or has_advanced(time, self._refuel[0])
+        )
+
+    def observe_refuel(self, time, liters_before, liters_after, odometer):
+        """Add a refuel event, completing the tank since the previous one."""
+        if not self.is_new_refuel(time):
+            return
+        if self._refuel is not None:
+            _, previous_liters, previous_odometer = self._refuel
+            if None not in (
+                previous_liters,
+                previous_odometer,
+                liters_before,
+                odometer,
+            ):
+                liters = previous_liters - liters_before
+                distance = odometer - previous_odometer
+                if liters >= MIN_LITERS and distance >= 0:
+                    self._tanks.append((distance, liters))
+                    self._tank_count += 1
+                    self._distance += distance
+                    self._liters += liters
+        self._refuel = (time, liters_after, odometer)
+        self._current = None
+
+    def observe_level(self, liters, odometer):
+        """Update the current tank from fuel level and odometer."""
+        if self._refuel is None or liters is None or odometer is None:
+            return
+        _, refuel_liters, refuel_odometer = self._refuel
+        if refuel_liters is None or refuel_odometer is None:
+            return
+        distance = odometer - refuel_odometer
+        self._current = (distance, refuel_liters - liters) if distance >= 0 else None
+
+    def statistics(self) -> dict:
+        """Get km/l of the current and last tank, rolling and lifetime."""
+        rolling = list(self._tanks)[-ROLLING_TANKS:]
+        return {
+            "current_tank": _economy(*self._current) if self._current else None,
+            "last_tank": _economy(*self._tanks[-1]) if self._tanks else None,
+            "rolling": _economy(
+                sum(tank[0] for tank in rolling), sum(tank[1] for tank in rolling)
+            )
+            if rolling
+            else None,
+            "lifetime": _economy(self._distance, self._liters),
+            "tanks": self._tank_count,
+            "distance": self._distance,
+            "liters": self._liters,
+        }
+
+    def export(self) -> dict:
+        """Get state for storage."""
+        return {
+            "refuel": self._refuel,
+            "tanks": list(self._tanks),
+            "tank_count": self._tank_count,
+            "distance": self._distance,
+            "liters": self._liters,
+        }
+
+    @classmethod
+    def restore(cls, stored):
+        """Create from stored state."""
+        fuel_economy = cls()
+        refuel = stored.get("refuel")
+        fuel_economy._refuel = tuple(refuel) if refuel is not None else None
+        fuel_economy._tanks.extend(tuple(tank) for tank in stored.get("tanks", []))
+        fuel_economy._tank_count = stored.get("tank_count", len(fuel_economy._tanks))
+        fuel_economy._distance = stored.get("distance", 0.0)
+        fuel_economy._liters = stored.get("liters", 0.0)
+        return fuel_economy
@@ -2,13 +2,38 @@
 
 import asyncio
 from datetime import UTC, datetime, timedelta
-import json
 import logging
 import traceback
+import sqlite3
+from typing import NamedTuple
 
 import aiohttp
 from dateutil.relativedelta import relativedelta
 
+from .aggregates import TripAggregates, parse_trip
+from .codec import encode_query, loads
+from .freshness import FieldFreshness, parse_time
+from .fueleconomy import FuelEconomy
+from .model import VehicleState
+from .odometer import OdometerIndex
+from .polling import (
+    TIER_INTERVALS,
+    TIER_LIVE,
+    TIER_SLOW,
+    TIER_STATUS,
+    TIERS,
+    VehiclePollState,
+)
+from .scheduler import RequestScheduler
+from .tripstore import TripStore, api_time, normalize_time
+from .transport import (
+    RETRY_STATUSES,
+    ApiError,
+    CircuitBreaker,
+    backoff_delay,
+    retry_after,
+)
+
 # import hashlib
 
 # Test
@@ -17,11 +42,240 @@ from dateutil.relativedelta import relativedelta
 _LOGGER = logging.getLogger(__name__)
 
 
+class VehicleDataSnapshot(NamedTuple):
+    """One read of vehicle data, as VehicleState by vehicle id.
+
+    Vehicle data of the API is parsed once and not kept. Targeted refreshes
+    merge into copies of the states. A snapshot is never modified after
+    creation, it is replaced as a whole.
+    """
+
+    vehicles: dict
+    expires: datetime
+
+
+# Vehicles aliased per query when requesting several vehicles at once
+VEHICLES_PER_QUERY = 10
+
+# Rolling windows of trip statistics, all requested together
+MILEAGE_WINDOWS = {
+    "week": relativedelta(weeks=-1),
+    "month": relativedelta(months=-1),
+    "quarter": relativedelta(months=-3),
+    "year": relativedelta(years=-1),
+}
+TRIP_STATISTICS_LIFETIME = timedelta(hours=1)
+
+# Trips synced to the local trip store per request, and extra history
+# backfilled before the longest mileage window
+TRIP_PAGE_SIZE = 100
+TRIP_BACKFILL_MARGIN = timedelta(days=1)
+
+# A trip may end this much before its ignition off time
+TRIP_END_TOLERANCE = timedelta(minutes=1)
+
+# All vehicles are read at this interval, in between only vehicle fields due
+FULL_REFRESH_INTERVAL = TIER_INTERVALS[TIER_SLOW]
+
+# Fields read for each vehicle, by name of the field and its freshness tier.
+# Live fields are read at the interval of the vehicle's poll state, status
+# fields no more often than TIER_INTERVALS[TIER_STATUS] and slow fields hourly.
+VEHICLE_FIELDS = {
+    "position": (
+        TIER_LIVE,
+        "position { latitude longitude speed direction time }",
+    ),
+    "ignition": (TIER_LIVE, "ignition { time on }"),
+    "odometer": (TIER_STATUS, "odometer { odometer time }"),
+    "fuelEconomy": (TIER_STATUS, "fuelEconomy"),
+    "fuelLevel": (TIER_STATUS, "fuelLevel { time liter }"),
+    "refuelEvents": (
+        TIER_STATUS,
+        "refuelEvents(limit: 1) { litersBefore litersAfter time }",
+    ),
+    "fuelPercentage": (TIER_STATUS, "fuelPercentage { percent time }"),
+    "adblueRemainingKm": (TIER_STATUS, "adblueRemainingKm(limit: 1) { km }"),
+    "chargePercentage": (TIER_STATUS, "chargePercentage { pct time }"),
+    "highVoltageBatteryTemperature": (
+        TIER_STATUS,
+        "highVoltageBatteryTemperature { celsius time }",
+    ),
+    "rangeTotalKm": (TIER_STATUS, "rangeTotalKm { km time }"),
+    "outdoorTemperatures": (
+        TIER_STATUS,
+        "outdoorTemperatures(limit: 1) { celsius time }",
+    ),
+    "latestBatteryVoltage": (TIER_STATUS, "latestBatteryVoltage { voltage time }"),
+    "health": (TIER_STATUS, "health { ok }"),
+    "odometerOffset": (TIER_SLOW, "odometerOffset"),
+    "vin": (TIER_SLOW, "vin"),
+    "licensePlate": (TIER_SLOW, "licensePlate"),
+    "name": (TIER_SLOW, "name"),
+    "brand": (TIER_SLOW, "brand"),
+    "make": (TIER_SLOW, "make"),
+    "model": (TIER_SLOW, "model"),
+    "year": (TIER_SLOW, "year"),
+    "engineSize": (TIER_SLOW, "engineSize"),
+    "avgCO2EmissionKm": (TIER_SLOW, "avgCO2EmissionKm"),
+    "fuelType": (TIER_SLOW, "fuelType"),
+    "fuelTankSize": (TIER_SLOW, "fuelTankSize(limit: 1)"),
+    "lampStates": (
+        TIER_SLOW,
+        "lampStates { type time enabled }",
+    ),
+    "service": (TIER_SLOW, "service { predictedDate }"),
+    "leads": (
+        TIER_SLOW,
+        """leads(statuses: [open], orderBy: {field: created_at, direction: DESC}) {
+      type
+      status
+      severityScore
+      value{amount, currency}
+      createdTime
+      updatedTime
+      lastActivityTime
+      bookingTime
+      lastContactedTime
+      context {
+        ... on LeadErrorCodeContext {
+            errorCode, ecu, provider, errorCodeCount, description, severity, firstErrorCodeTime, lastErrorCodeTime
+        }
+        ... on LeadLowBatteryVoltageContext {
+            sourceMedianVoltage { voltage }
+        }
+        ... on LeadServiceReminderContext {
+            serviceDate, oilEstimateUncertain, sourceData { type, value }
+        }
+        ... on  LeadConnectivityIssueContext{
+            latestVehiclePositionRecordTime
+        }
+        ... on  LeadEngineLampContext{
+            lamps { type, color, title, subtitle, recommendationText, descriptionTitle, descriptionText }
+        }
+        ... on LeadMainPowerDisconnectContext{
+            disconnectionEventTime, disconnectionLatitude, disconnectionLongitude, disconnectionPositionTime, unitConnectionState, lastConnectionEventTime, incidentCount
+        }
+        ... on LeadDefaultContext{
+          context
+        }
+        ... on LeadRapidBatteryDischargeContext{
+           time, durationHours, minVoltage, maxVoltage, voltageDrop
+        }
+        ... on LeadQuoteContext{
+            quote{workshop{name},title,price{amount, currency},expirationDate,status}
+        }
+        ... on UserReportedLampLeadContext{
+            type, color, frequency, source
+        }
+      }
+    }
+""",
+    ),
+}
+
+
+# Fields always read, needed to identify vehicles and for their poll state
+REQUIRED_FIELDS = frozenset(
+    ("vin", "licensePlate", "name", "make", "model", "ignition", "position")
+)
+
+
+def build_vehicle_selection(tiers, fields=None):
+    """Build selection of vehicle fields belonging to the given tiers.
+
+    With fields given, only those and REQUIRED_FIELDS are selected. Returns
+    None if no field of the tiers is selected.
+    """
+    selection = ""
+    for field, (tier, field_selection) in VEHICLE_FIELDS.items():
+        if tier in tiers and (
+            fields is None or field in fields or field in REQUIRED_FIELDS
+        ):
+            selection += field_selection + "\n"
+    if not selection:
+        return None
+    return "id\n" + selection
+
+
+def build_vehicles_query(fields=None):
+    """Build query of all vehicles of the account."""
+    return (
+        """query User {
+  viewer {
+    vehicles {
+      primary
+      vehicle {
+"""
+        + build_vehicle_selection(TIERS, fields)
+        + """      }
+    }
+  }
+}
+"""
+    )
+
+
+# Connection pool used when no session is injected
+CONNECTION_LIMIT = 10
+CONNECTION_LIMIT_PER_HOST = 4
+KEEPALIVE_TIMEOUT = 120
+
+# Requests of one account sent at the same time, and started per second
+MAX_CONCURRENT_REQUESTS = CONNECTION_LIMIT_PER_HOST
+MAX_REQUESTS_PER_SECOND = 5
+
+# Failed queries are retried after a jittered, exponentially growing delay,
+# or the delay asked for by the server if not longer than RETRY_DELAY_MAX
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+MAX_RETRIES = 3
+RETRY_DELAY_BASE = timedelta(seconds=1)
+RETRY_DELAY_MAX = timedelta(seconds=60)
+
+# Requests are paused this long after failing this many times in a row
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_DURATION = timedelta(minutes=5)
+
+
 class MinVW:
     """Primary exported interface for connectedcars.io API wrapper."""
 
-    def __init__(self, email, password, namespace) -> None:
-        """Initialize."""
+    def __init__(
+        self,
+        email,
+        password,
+        namespace,
+        session: aiohttp.ClientSession = None,
+        max_staleness: timedelta = None,
+        request_cache_ttl: timedelta = None,
+        mileage_windows: dict = None,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+        max_requests_per_second: float = MAX_REQUESTS_PER_SECOND,
+        trip_store_path: str = None,
+    ) -> None:
+        """Initialize.
+
+        A long-lived session can be injected, e.g. the one shared by Home
+        Assistant. Otherwise a pooled keep-alive session is created on first use
+        and must be released with close().
+
+        With max_staleness set, expired vehicle data is still returned for up to
+        that long while it is refreshed in the background (stale-while-revalidate).
+
+        Concurrent identical API requests are always sent once. With
+        request_cache_ttl set, their result is also reused for that long.
+
+        mileage_windows maps names of rolling trip statistics windows to their
+        (negative) length, MILEAGE_WINDOWS by default.
+
+        Independent requests, e.g. for several vehicles, are sent concurrently
+        up to max_concurrent_requests, starting at most max_requests_per_second.
+
+        With trip_store_path set, trips are kept in a local SQLite database at
+        that path, synced incrementally, and trip, mileage and odometer
+        questions are answered from it.
+        """
+        self._session = session
+        self._session_owned = False
         self._email = email
         self._password = password
         self._namespace = namespace
@@ -29,122 +283,272 @@ class MinVW:
         self._base_url_graph = "https://api.connectedcars.io/"
         self._accesstoken = None
         self._at_expires = None
-        self._data = None
-        self._data_expires = None
+        self._token_listeners = []
+        self._snapshot = None
+        self._restored_snapshot = None
+        self._restored_instances = None
+        self._capabilities = None
+        self._additional_capabilities = {}
+        self._poll_states = {}
+        self._freshness = FieldFreshness()
+        self._requested_fields = None
+        self._full_refresh_due = None
+        self._max_staleness = max_staleness
+        self._refresh_task = None
+        self._refresh_listeners = []
+        self._request_cache_ttl = request_cache_ttl
+        self._request_cache = {}
+        self._requests_in_flight = {}
+        self._scheduler = RequestScheduler(
+            max_concurrent_requests, max_requests_per_second
+        )
+        self._circuit_breaker = CircuitBreaker(
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_DURATION
+        )
+        self._mileage_windows = (
+            mileage_windows if mileage_windows is not None else MILEAGE_WINDOWS
+        )
+        self._trip_statistics = None
+        self._trip_statistics_expires = None
+        self._trip_store = (
+            TripStore(trip_store_path) if trip_store_path is not None else None
+        )
+        self._trip_sync_markers = {}
+        self._trip_aggregates = {}
+        self._odometer_indexes = {}
+        self._fuel_economies = {}
+        self._lock_trip_sync = asyncio.Lock()
+        self._lock_trip_statistics = asyncio.Lock()
+        self._lock_capabilities = asyncio.Lock()
         self._lock_update = asyncio.Lock()
+        self._lock_token = asyncio.Lock()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get session used for all requests, creating a pooled one if needed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_owned = True
+        return self._session
+
+    async def close(self):
+        """Close the session, unless it was injected."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+        if self._session_owned and self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._session_owned = False
+        if self._trip_store is not None:
+            await self._run_trip_store(self._trip_store.close)
+
+    def get_cached_next_service_data_predicted(self, vehicle_id):
+        """Get next service date from the most recently read data."""
+        vehicle = self.get_cached_vehicle_state(vehicle_id)
+        return vehicle.next_service_predicted if vehicle is not None else None
 
-    async def get_next_service_data_predicted(self, vehicle_id):
-        """Calculate number of days until next service. Prodicted."""
-        ret = None
-        date_str = await self.get_value(vehicle_id, ["service", "predictedDate"])
+    async def api_request(self, req_param):
+        """Make an API request for data.
 
-        if date_str is not None:
-            ret = datetime.strptime(date_str, "%Y-%m-%d").date()
-            # ret = (date - datetime.now().date()).days
-            # if ret < 0:
-            #  ret = 0
-        return ret
+        Identical requests made while one is in flight share its response.
+        The returned data is shared as well and must not be modified.
+        """
+        now = datetime.now(UTC)
+        cached = self._request_cache.get(req_param)
+        if cached is not None and now <= cached[0]:
+            return cached[1]
+
+        task = self._requests_in_flight.get(req_param)
+        if task is None:
+            task = asyncio.create_task(self._api_request_shared(req_param))
+            self._requests_in_flight[req_param] = task
+        # A cancelled caller must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _api_request_shared(self, req_param):
+        """Make an API request on behalf of all callers, caching the result."""
+        try:
+            ret = await self._api_request(req_param)
+            if ret is not None and self._request_cache_ttl is not None:
+                now = datetime.now(UTC)
+                self._request_cache = {
+                    key: value
+                    for key, value in self._request_cache.items()
+                    if now <= value[0]
+                }
+                self._request_cache[req_param] = (now + self._request_cache_ttl, ret)
+            return ret
+        finally:
+            self._requests_in_flight.pop(req_param, None)
 
-    async def api_request(self, req_param):
-        """Make an API request for data."""
+    async def _api_request(self, req_param):
+        """Send an API request for data.
+
+        Does not hold the update lock, so cached vehicle data can still be read
+        while waiting for the response.
+        """
         ret = None
 
         try:
-            async with self._lock_update:
-                headers = {
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                    "x-organization-namespace": f"semler:{self._namespace}",
-                    "User-Agent": "ConnectedCars/360 CFNetwork/978.0.7 Darwin/18.7.0",
-                    "Authorization": f"Bearer {await self._get_access_token()}",
-                }
+            ret = await self._send_query(req_param)
+        except (ApiError, aiohttp.ClientError, TimeoutError) as err:
+            _LOGGER.warning("Request failed: %s", str(err))
+            _LOGGER.debug("%s", traceback.format_exc())
+
+        return ret
 
-                req_body = {"query": req_param}
-                req_url = self._base_url_graph + "graphql"
+    async def _send_query(self, query):
+        """Send a GraphQL query and return the decoded response.
 
+        Queries only read data, so timeouts, connection errors and transient
+        server errors are retried up to MAX_RETRIES times. Repeated failures
+        open the circuit breaker, failing further queries right away with
+        ApiUnavailableError until it lets a trial query through, which is
+        retried like any other.
+        """
+        req_url = self._base_url_graph + "graphql"
+        req_body = encode_query(query)
+        attempt = 0
+        self._circuit_breaker.check()
+        while True:
+            # The access token is got first, authenticating takes a slot itself
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "x-organization-namespace": f"semler:{self._namespace}",
+                "User-Agent": "ConnectedCars/360 CFNetwork/978.0.7 Darwin/18.7.0",
+                "Authorization": f"Bearer {await self._get_access_token()}",
+            }
+
+            delay = None
+            try:
                 async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(req_url, json=req_body, headers=headers) as response,
+                    self._scheduler.slot(),
+                    self._get_session().post(
+                        req_url, data=req_body, headers=headers, timeout=REQUEST_TIMEOUT
+                    ) as response,
                 ):
                     if response.ok:
-                        ret = await response.json()
+                        try:
+                            data = loads(await response.read())
+                        except ValueError as err:
+                            raise ApiError(f"Invalid response: {err}") from err
+                        self._circuit_breaker.record_success()
+                        return data
+
+                    error = ApiError(
+                        f"Unexpected response {response.status}: "
+                        f"{(await response.text())[:200]}"
+                    )
+                    if response.status == 401:
+                        # Token rejected, authenticate again once
+                        self._at_expires = None
+                        retryable = attempt == 0
                     else:
-                        _LOGGER.warning(
-                            "Unexpected response: %s", await response.read()
-                        )
-
-                # async with aiohttp.ClientSession() as session:
-                #     async with session.post(
-                #         req_url, json=req_body, headers=headers
-                #     ) as response:
-                #         if response.ok:
-                #             ret = await response.json()
-                #         else:
-                #             _LOGGER.warning(
-                #                 "Unexpected response: %s", await response.read()
-                #             )
-
-        except aiohttp.ClientConnectionError as err:
-            _LOGGER.warning("Connection error: %s", str(err))
-            _LOGGER.debug("%s", traceback.format_exc())
-
-        return ret
+                        retryable = response.status in RETRY_STATUSES
+                        delay = retry_after(response.headers)
+            except (aiohttp.ClientError, TimeoutError) as err:
+                error = err
+                retryable = True
+
+            if delay is not None and delay > RETRY_DELAY_MAX:
+                # Asked to back off longer than worth waiting for
+                self._circuit_breaker.trip(delay)
+                raise error
+            if not retryable:
+                raise error
+            if attempt >= MAX_RETRIES:
+                self._circuit_breaker.record_failure()
+                raise error
+
+            if delay is None:
+                delay = backoff_delay(attempt, RETRY_DELAY_BASE, RETRY_DELAY_MAX)
+            attempt += 1
+            _LOGGER.debug(
+                "Retrying query in %.1f s (%s/%s): %s",
+                delay.total_seconds(),
+                attempt,
+                MAX_RETRIES,
+                error,
+            )
+            await asyncio.sleep(delay.total_seconds())
 
     async def get_latest_years_mileage(self, vehicle_id, latest_month):
         """Get mileage for latest year or month."""
-        ret = None
-        att = {}
+        return await self.get_mileage(vehicle_id, "month" if latest_month else "year")
 
-        req_param = """query YearlyMileage {
-  vehicle(id: %s) {
+    async def get_mileage(self, vehicle_id, window):
+        """Get mileage for one of the rolling windows, e.g. "year" or "week".
 
-    totalTripStatistics(period: {first: "%s", last: "%s"} ) {mileageInKm, driveDurationInMinutes, numberTrips, longestMileageInKm}
-  }
-}
+        Answered from the local trip store when it covers the window. Then
+        window may also be any other (negative) relativedelta or timedelta.
         """
+        ret = None
+        att = {}
 
-        date = datetime.now(UTC)  # datetime.utcnow()
-        time_delta = relativedelta(years=-1)
-        if latest_month:
-            time_delta = relativedelta(months=-1)
-
-        req_param = req_param % (
-            vehicle_id,
-            (date + time_delta)
-            .isoformat(timespec="milliseconds")
-            .replace("+00:00", "Z"),
-            date.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
-        )
+        stats = await self._get_local_trip_statistics(vehicle_id, window)
+        if stats is None:
+            statistics = await self.get_trip_statistics()
+            stats = self._get_vehicle_value(statistics, [vehicle_id, window])
 
-        vehicle_data = await self.api_request(req_param)
-        ret = self._get_vehicle_value(
-            vehicle_data, ["data", "vehicle", "totalTripStatistics", "mileageInKm"]
-        )
+        ret = self._get_vehicle_value(stats, ["mileageInKm"])
         if ret is not None:
             ret = round(ret, 1)
 
-        value = self._get_vehicle_value(
-            vehicle_data,
-            ["data", "vehicle", "totalTripStatistics", "driveDurationInMinutes"],
-        )
+        value = self._get_vehicle_value(stats, ["driveDurationInMinutes"])
         if value is not None:
             value = round(value)
         att["Duration in minutes"] = value
 
-        att["Trips"] = self._get_vehicle_value(
-            vehicle_data, ["data", "vehicle", "totalTripStatistics", "numberTrips"]
-        )
+        att["Trips"] = self._get_vehicle_value(stats, ["numberTrips"])
 
-        value = self._get_vehicle_value(
-            vehicle_data,
-            ["data", "vehicle", "totalTripStatistics", "longestMileageInKm"],
-        )
+        value = self._get_vehicle_value(stats, ["longestMileageInKm"])
         if value is not None:
             value = round(value, 1)
         att["Longest trip in km"] = value
 
         return ret, att
 
+    async def get_trip_statistics(self):
+        """Get trip statistics of all rolling windows for all vehicles.
+
+        One query covers every window and vehicle of the account. The result is
+        kept for TRIP_STATISTICS_LIFETIME and shared by all mileage sensors.
+        """
+        async with self._lock_trip_statistics:
+            if (
+                self._trip_statistics is None
+                or datetime.now(UTC) > self._trip_statistics_expires
+            ):
+                vehicle_ids = list(await self._get_vehicle_data())
+
+                date = datetime.now(UTC)  # datetime.utcnow()
+                last = date.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+                req_param = ""
+                for window, time_delta in self._mileage_windows.items():
+                    first = (
+                        (date + time_delta)
+                        .isoformat(timespec="milliseconds")
+                        .replace("+00:00", "Z")
+                    )
+                    req_param += f"""    {window}: totalTripStatistics(period: {{first: "{first}", last: "{last}"}}) {{mileageInKm, driveDurationInMinutes, numberTrips, longestMileageInKm}}
+"""
+
+                statistics = await self._api_request_vehicles(
+                    "TripStatistics", vehicle_ids, req_param
+                )
+                # Keep previous statistics if the request failed
+                if any(value is not None for value in statistics.values()):
+                    self._trip_statistics = statistics
+                    self._trip_statistics_expires = date + TRIP_STATISTICS_LIFETIME
+
+        return self._trip_statistics
+
     #     async def get_mileage_since_refuel(self, vehicle_id):
     #         """Calculate distance since last refuel event."""
     #         _LOGGER.warning("get_mileage_since_refuel...")
@@ -192,10 +596,352 @@ class MinVW:
 
     #         return ret, att
 
+    async def _run_trip_store(self, method, *args):
+        """Run a blocking method of the trip store in an executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def sync_trips(self, vehicle_ids=None):
+        """Sync trips of vehicles to the local trip store.
+
+        Trips are first backfilled from before the longest mileage window.
+        After that only trips newer than the last stored one are requested,
+        each time a vehicle has been driven until the trip ending at its
+        ignition off time has been synced.
+        """
+        if self._trip_store is None:
+            return
+        async with self._lock_trip_sync:
+            if vehicle_ids is None:
+                snapshot = self._snapshot
+                vehicle_ids = list(snapshot.vehicles) if snapshot else []
+            due = {}
+            for vehicle_id in vehicle_ids:
+                vehicle = self.get_cached_vehicle_state(vehicle_id)
+                marker = vehicle.ignition_time if vehicle is not None else None
+                if vehicle_id not in self._trip_sync_markers or (
+                    marker != self._trip_sync_markers[vehicle_id]
+                    and not (vehicle is not None and vehicle.ignition_on)
+                ):
+                    due[vehicle_id] = vehicle
+            results = await asyncio.gather(
+                *(self._sync_vehicle_trips(vehicle_id) for vehicle_id in due)
+            )
+            for (vehicle_id, vehicle), cursor in zip(due.items(), results, strict=True):
+                if cursor is None:
+                    continue
+                if vehicle is None:
+                    self._trip_sync_markers[vehicle_id] = None
+                    continue
+                # Synced again until the trip that just ended is returned
+                if (
+                    vehicle.ignition_on
+                    or vehicle.ignition_changed is None
+                    or parse_time(cursor)
+                    >= vehicle.ignition_changed - TRIP_END_TOLERANCE
+                ):
+                    self._trip_sync_markers[vehicle_id] = vehicle.ignition_time
+
+    async def _request_trip_pages(self, vehicle_id, cursor):
+        """Request trips of a vehicle after a cursor, page by page.
+
+        Yields the trips of each page with the cursor after it, the end time
+        of its newest trip. Raises ApiError if a page fails.
+        """
+        while True:
+            req_param = f"""query Trips {{
+  vehicle(id: {vehicle_id}) {{
+    trips(fromTime: "{api_time(cursor)}", first: {TRIP_PAGE_SIZE}){{items{{mileage, startOdometer, endOdometer, startTime, endTime}}}}
+  }}
+}}"""
+            items = self._get_vehicle_value(
+                await self.api_request(req_param),
+                ["data", "vehicle", "trips", "items"],
+            )
+            if items is None:
+                raise ApiError(f"Failed to request trips of vehicle {vehicle_id}")
+
+            # Trips still in progress are stored once they have ended
+            end_times = [
+                normalize_time(trip.get("endTime"))
+                for trip in items
+                if trip.get("endTime") is not None
+            ]
+            new_cursor = max([cursor, *filter(None, end_times)])
+            yield items, new_cursor
+            if len(items) < TRIP_PAGE_SIZE or new_cursor == cursor:
+                return
+            cursor = new_cursor
+
+    def _index_synced_trips(self, vehicle_id, trips):
+        """Add trips of the API to the in-memory indexes, if loaded."""
+        if vehicle_id in self._trip_aggregates:
+            self._add_trips_to_indexes(
+                vehicle_id,
+                [
+                    (
+                        trip.get("startTime"),
+                        trip.get("endTime"),
+                        trip.get("mileage"),
+                        trip.get("startOdometer"),
+                        trip.get("endOdometer"),
+                    )
+                    for trip in trips
+                ],
+            )
+
+    async def _sync_vehicle_trips(self, vehicle_id) -> str | None:
+        """Request trips of a vehicle after its cursor, page by page.
+
+        Returns the new cursor, None if syncing failed.
+        """
+        try:
+            sync_state = await self._run_trip_store(
+                self._trip_store.get_sync_state, vehicle_id
+            )
+            if sync_state is None:
+                first = min(
+                    datetime.now(UTC) + time_delta
+                    for time_delta in self._mileage_windows.values()
+                )
+                covered_from = normalize_time(first - TRIP_BACKFILL_MARGIN)
+                cursor = covered_from
+            else:
+                covered_from, cursor = sync_state
+
+            added = 0
+            async for items, cursor in self._request_trip_pages(vehicle_id, cursor):
+                added += await self._run_trip_store(
+                    self._trip_store.add_trips,
+                    vehicle_id,
+                    items,
+                    covered_from,
+                    cursor,
+                )
+                self._index_synced_trips(vehicle_id, items)
+        except ApiError:
+            return None
+        except sqlite3.Error as err:
+            _LOGGER.warning("Failed to sync trips of vehicle %s: %s", vehicle_id, err)
+            return None
+
+        if added:
+            _LOGGER.debug("Synced %s trips of vehicle %s", added, vehicle_id)
+        return cursor
+
+    async def backfill_trips(self, vehicle_id, first: datetime) -> list[dict]:
+        """Request all trips of a vehicle since first, page by page.
+
+        The trips are also added to the trip store, which then covers the
+        time since first, together with the stored time if they overlap.
+        Raises ApiError if a page fails.
+        """
+        async with self._lock_trip_sync:
+            covered_from = normalize_time(first)
+            cursor = covered_from
+            trips = []
+            async for items, cursor in self._request_trip_pages(
+                vehicle_id, covered_from
+            ):
+                trips.extend(items)
+
+            if self._trip_store is not None:
+                try:
+                    sync_state = await self._run_trip_store(
+                        self._trip_store.get_sync_state, vehicle_id
+                    )
+                    # The backfill covers first until now. It joins the stored
+                    # range only if that reaches first, otherwise trips between
+                    # them would be missing and only the backfill is covered.
+                    if sync_state is not None and covered_from <= sync_state[1]:
+                        covered_from = min(covered_from, sync_state[0])
+                        cursor = max(cursor, sync_state[1])
+                    await self._run_trip_store(
+                        self._trip_store.add_trips,
+                        vehicle_id,
+                        trips,
+                        covered_from,
+                        cursor,
+                    )
+                    self._index_synced_trips(vehicle_id, trips)
+                except sqlite3.Error as err:
+                    _LOGGER.warning(
+                        "Failed to store trips of vehicle %s: %s", vehicle_id, err
+                    )
+
+        _LOGGER.debug("Backfilled %s trips of vehicle %s", len(trips), vehicle_id)
+        return trips
+
+    def _get_odometer_index(self, vehicle_id) -> OdometerIndex:
+        """Get odometer index of a vehicle, creating it if needed."""
+        return self._odometer_indexes.setdefault(vehicle_id, OdometerIndex())
+
+    def _observe_odometers(self, vehicles):
+        """Add odometer values of vehicle data to the odometer indexes."""
+        for vehicle_id, vehicle in vehicles.items():
+            if vehicle.odometer is not None:
+                self._get_odometer_index(vehicle_id).add(
+                    self._freshness.get_time(vehicle_id, "odometer"), vehicle.odometer
+                )
+
+    async def _observe_refuels(self, vehicles):
+        """Update fuel economy of vehicles from refuel events and fuel level.
+
+        The odometer at a new refuel event is looked up in the odometer index.
+        If the event is newer than its samples, the car has not been driven
+        since and the current odometer applies.
+        """
+        for vehicle_id, vehicle in vehicles.items():
+            if vehicle.refuel_time is None and vehicle_id not in self._fuel_economies:
+                continue
+            fuel_economy = self._fuel_economies.setdefault(vehicle_id, FuelEconomy())
+            if fuel_economy.is_new_refuel(vehicle.refuel_time):
+                refuel_time = parse_time(vehicle.refuel_time)
+                odometer = None
+                if refuel_time is not None:
+                    if self._trip_store is not None:
+                        try:
+                            await self._load_trip_indexes(vehicle_id)
+                        except sqlite3.Error as err:
+                            _LOGGER.warning("Failed to read trips: %s", err)
+                    odometer = self._get_odometer_index(vehicle_id).get_odometer_at(
+                        refuel_time
+                    )
+                    odometer_time = self._freshness.get_time(vehicle_id, "odometer")
+                    if (
+                        odometer is None
+                        and odometer_time is not None
+                        and odometer_time <= refuel_time
+                    ):
+                        odometer = vehicle.odometer
+                fuel_economy.observe_refuel(
+                    vehicle.refuel_time,
+                    vehicle.refuel_liters_before,
+                    vehicle.refuel_liters_after,
+                    odometer,
+                )
+            fuel_economy.observe_level(vehicle.fuel_level, vehicle.odometer)
+
+    def get_fuel_economy(self, vehicle_id) -> dict | None:
+        """Get fuel economy statistics of a vehicle, None if no refuel seen."""
+        fuel_economy = self._fuel_economies.get(vehicle_id)
+        return fuel_economy.statistics() if fuel_economy is not None else None
+
+    def _add_trips_to_indexes(self, vehicle_id, trips):
+        """Add (start, end, mileage, start odometer, end odometer) of trips."""
+        aggregates = self._trip_aggregates.setdefault(vehicle_id, TripAggregates())
+        aggregates.add(parse_trip(*trip[:3]) for trip in trips)
+        odometer_index = self._get_odometer_index(vehicle_id)
+        for start_time, end_time, _, start_odometer, end_odometer in trips:
+            if start_time is None or end_time is None:
+                continue
+            odometer_index.add_trip(
+                parse_time(start_time),
+                parse_time(end_time),
+                start_odometer,
+                end_odometer,
+            )
+
+    async def _load_trip_indexes(self, vehicle_id):
+        """Load stored trips of a vehicle into the in-memory indexes, once.
+
+        Synced trips are added to the indexes after that. Loading holds the
+        trip sync lock, so trips synced meanwhile are neither missed nor read
+        from the store before they are committed.
+        """
+        if vehicle_id in self._trip_aggregates:
+            return
+        async with self._lock_trip_sync:
+            if vehicle_id in self._trip_aggregates:
+                return
+            trips = await self._run_trip_store(self._trip_store.get_trips, vehicle_id)
+            self._add_trips_to_indexes(
+                vehicle_id,
+                [
+                    (
+                        trip["start_time"],
+                        trip["end_time"],
+                        trip["mileage"],
+                        trip["start_odometer"],
+                        trip["end_odometer"],
+                    )
+                    for trip in trips
+                ],
+            )
+
+    async def _get_local_trip_statistics(self, vehicle_id, window):
+        """Get trip statistics of a rolling window from the trip store.
+
+        Totals are kept in memory per vehicle, loaded from the store once and
+        updated with each synced trip. Returns None if the store does not
+        cover the window.
+        """
+        time_delta = (
+            self._mileage_windows.get(window) if isinstance(window, str) else window
+        )
+        if self._trip_store is None or time_delta is None:
+            return None
+        await self.sync_trips([vehicle_id])
+        now = datetime.now(UTC)
+        first = now + time_delta
+        try:
+            sync_state = await self._run_trip_store(
+                self._trip_store.get_sync_state, vehicle_id
+            )
+            if sync_state is None or sync_state[0] > normalize_time(first):
+                return None
+            await self._load_trip_indexes(vehicle_id)
+        except sqlite3.Error as err:
+            _LOGGER.warning("Failed to read trips: %s", err)
+            return None
+        return self._trip_aggregates[vehicle_id].statistics(first, now)
+
+    async def get_odometer_at_time(self, vehicle_id, isotime):
+        """Get odometer at a specific time.
+
+        Answered from the odometer index of stored trips and observed vehicle
+        data. Only times outside it are requested as the start of the next
+        trip from the API.
+        """
+        time = parse_time(isotime)
+        if time is None:
+            return None
+
+        if self._trip_store is not None:
+            await self.sync_trips([vehicle_id])
+            try:
+                await self._load_trip_indexes(vehicle_id)
+            except sqlite3.Error as err:
+                _LOGGER.warning("Failed to read trips: %s", err)
+        odometer = self._get_odometer_index(vehicle_id).get_odometer_at(time)
+        if odometer is not None:
+            return odometer
+
+        trip = await self.get_trip_at_time(vehicle_id, isotime)
+        return trip.get("startOdometer") if trip is not None else None
+
     async def get_trip_at_time(self, vehicle_id, isotime):
-        """Get trip at a specific time."""
+        """Get trip at a specific time.
+
+        Answered from the local trip store when it has the trip.
+        """
         trip = None
 
+        time = normalize_time(isotime)
+        if self._trip_store is not None and time is not None:
+            await self.sync_trips([vehicle_id])
+            try:
+                sync_state = await self._run_trip_store(
+                    self._trip_store.get_sync_state, vehicle_id
+                )
+                if sync_state is not None and sync_state[0] <= time:
+                    trip = await self._run_trip_store(
+                        self._trip_store.get_trip_at, vehicle_id, time
+                    )
+            except sqlite3.Error as err:
+                _LOGGER.warning("Failed to read trips: %s", err)
+            if trip is not None:
+                return trip
+
         req_param = """query fuel {
   vehicle(id: %s) {
     trips(fromTime: "%s", first: 1 ){items{mileage, gpsMileage, odometerMileage, startOdometer, endOdometer, startTime, endTime, time}}
@@ -242,70 +988,6 @@ class MinVW:
 
     #         return odometer
 
-    #     async def get_fuel_economy(self, vehicle_id):
-    #         """Calculate distance driven per liter of fuel."""
-    #         ret = None
-    #         att = dict()
-
-    #         req_param = """query fuel {
-    #   vehicle(id: %s) {
-    #     refuelEvents(limit: 2, order: DESC) {
-    #       litersAfter
-    #       litersBefore
-    #       time
-    #     }
-    #     fuelLevel {
-    #       time
-    #       liter
-    #     }
-    #   }
-    # }
-    #         """
-    #         req_param = req_param % (vehicle_id)
-
-    #         vehicle_data = await self.api_request(req_param)
-
-    #         fuelevents = self._get_vehicle_value(
-    #             vehicle_data, ["data", "vehicle", "refuelEvents"]
-    #         )
-    #         fuellevel = self._get_vehicle_value(
-    #             vehicle_data, ["data", "vehicle", "fuelLevel"]
-    #         )
-
-    #         if fuelevents is not None and len(fuelevents) >= 2 and fuellevel is not None:
-
-    #             fuel_used = 0
-    #             fuel_used += fuelevents[1]["litersAfter"] - fuelevents[0]["litersBefore"]
-    #             fuel_used += fuelevents[0]["litersAfter"] - fuellevel["liter"]
-    #             att["Fuel used"] = fuel_used
-
-    #             # Request distance
-    #             time_start = fuelevents[1]["time"]
-    #             time_end = fuellevel["time"]
-
-    #             req_param = """query fuelDistance {
-    #   vehicle(id: %s) {
-    #     totalTripStatistics(period: {first: "%s", last: "%s"} ) { mileageInKm }
-    #   }
-    # }
-    #             """
-    #             req_param = req_param % (
-    #                 vehicle_id,
-    #                 time_start,
-    #                 time_end,
-    #             )
-
-    #             vehicle_data = await self.api_request(req_param)
-    #             distance = self._get_vehicle_value(
-    #                 vehicle_data, ["data", "vehicle", "totalTripStatistics", "mileageInKm"]
-    #             )
-
-    #             if distance is not None:
-    #                 att["distance"] = distance
-    #                 ret = round(distance / fuel_used, 1)
-
-    #         return ret, att
-
     def has_value(self, obj, key) -> bool:
         """Check if object has key."""
         return key in obj and obj[key] is not None
@@ -319,103 +1001,100 @@ class MinVW:
                     obj_dst[key] = obj_src[key]
         return obj_dst
 
-    async def get_leads(self, vehicle_id):
-        """Find vehicle."""
+    def get_cached_leads(self, vehicle_id):
+        """Get leads from the most recently read data."""
+        vehicle = self.get_cached_vehicle_state(vehicle_id)
+        return list(vehicle.leads) if vehicle is not None else []
+
+    def _extract_leads(self, vehicle):
+        """Extract leads of a vehicle node, once per refresh."""
         ret = []
-        data = await self._get_vehicle_data()
-        for item in data["data"]["viewer"]["vehicles"]:
-            vehicle = item["vehicle"]
-            if vehicle["id"] == vehicle_id:
-                # j = 0
-                for lead in vehicle["leads"]:
-                    try:
-                        # Basic info
-                        element = {
-                            "type": lead["type"],
-                            "createdTime": lead["createdTime"],
-                        }
-                        # Optional info
-                        element = self.obj_copy_attributes(
-                            lead,
-                            element,
-                            [
-                                "updatedTime",
-                                "bookingTime",
-                                "lastContactedTime",
-                                "severityScore",
-                            ],
-                        )
-                        # Value
-                        if self.has_value(lead, "value"):
-                            element["value"] = (
-                                f"{lead['value']['amount']} {lead['value']['currency']}"
-                            )
+        # j = 0
+        for lead in vehicle.get("leads") or []:
+            try:
+                # Basic info
+                element = {
+                    "type": lead["type"],
+                    "createdTime": lead["createdTime"],
+                }
+                # Optional info
+                element = self.obj_copy_attributes(
+                    lead,
+                    element,
+                    [
+                        "updatedTime",
+                        "bookingTime",
+                        "lastContactedTime",
+                        "severityScore",
+                    ],
+                )
+                # Value
+                if self.has_value(lead, "value"):
+                    element["value"] = (
+                        f"{lead['value']['amount']} {lead['value']['currency']}"
+                    )
 
-                        # Context - Type specific info
+                # Context - Type specific info
+                if self.has_value(lead, "context"):
+                    # Type: service_reminder
+                    if lead["type"] == "service_reminder":
+                        element["context"] = self.obj_copy_attributes(
+                            lead["context"],
+                            {},
+                            ["serviceDate", "oilEstimateUncertain"],
+                        )
+                        if lead["context"]["sourceData"] is not None:
+                            for data in lead["context"]["sourceData"]:
+                                if (
+                                    data is not None
+                                    and data["type"] is not None
+                                    and data["value"] is not None
+                                ):
+                                    element["context"][data["type"]] = data["value"]
+                    else:
                         if self.has_value(lead, "context"):
-                            # Type: service_reminder
-                            if lead["type"] == "service_reminder":
-                                element["context"] = self.obj_copy_attributes(
-                                    lead["context"],
-                                    {},
-                                    ["serviceDate", "oilEstimateUncertain"],
-                                )
-                                if lead["context"]["sourceData"] is not None:
-                                    for data in lead["context"]["sourceData"]:
-                                        if (
-                                            data is not None
-                                            and data["type"] is not None
-                                            and data["value"] is not None
-                                        ):
-                                            element["context"][data["type"]] = data[
-                                                "value"
-                                            ]
-                            else:
-                                if self.has_value(lead, "context"):
-                                    element["context"] = lead["context"]
-
-                            # Remove emply values in context
-                            remove_keys = []
-                            if element["context"] is not None:
-                                for key in element["context"]:
-                                    if element["context"][key] is None:
-                                        _LOGGER.debug("Key to remove: %s", key)
-                                        remove_keys.append(key)
-                            for key in remove_keys:
-                                element["context"].pop(key)
-
-                        ret.append(element)
-
-                        # j = j + 1
-                        # if j >= 5:
-                        #     break
-
-                    except Exception as err:  # pylint: disable=broad-except
-                        _LOGGER.error("Failed to handle lead: %s\n%s", lead, err)
+                            element["context"] = lead["context"]
 
-        return ret
+                    # Remove emply values in context
+                    remove_keys = []
+                    if element["context"] is not None:
+                        for key in element["context"]:
+                            if element["context"][key] is None:
+                                _LOGGER.debug("Key to remove: %s", key)
+                                remove_keys.append(key)
+                    for key in remove_keys:
+                        element["context"].pop(key)
 
-    async def get_value_float(self, vehicle_id, selector):
-        """Extract a float value from read data."""
-        ret = None
-        data = await self.get_value(vehicle_id, selector)
-        if isinstance(data, str):  # type(data) == str
-            ret = float(data)
-        if isinstance(data, (float, int)):
-            ret = data
-        return ret
+                ret.append(element)
+
+                # j = j + 1
+                # if j >= 5:
+                #     break
+
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.error("Failed to handle lead: %s\n%s", lead, err)
 
-    async def get_value(self, vehicle_id, selector):
-        """Find vehicle."""
-        ret = None
-        data = await self._get_vehicle_data()
-        # vehicles = []
-        for item in data["data"]["viewer"]["vehicles"]:
-            vehicle = item["vehicle"]
-            if vehicle["id"] == vehicle_id:
-                ret = self._get_vehicle_value(vehicle, selector)
         return ret
 
+    def get_field_time(self, vehicle_id, field):
+        """Get the latest time a vehicle field was measured, None if unknown."""
+        return self._freshness.get_time(vehicle_id, field)
+
+    def get_field_times(self, vehicle_id):
+        """Get the latest time each vehicle field was measured, by field."""
+        return self._freshness.get_times(vehicle_id)
+
+    def get_field_age(self, vehicle_id, field):
+        """Get time since a vehicle field was measured, None if unknown."""
+        return self._freshness.get_age(vehicle_id, field)
+
+    def get_cached_vehicle_state(self, vehicle_id) -> VehicleState | None:
+        """Get values of a vehicle from the most recently read data."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.vehicles.get(vehicle_id)
+
     def _get_vehicle_value(self, vehicle, selector):
         """Get selected attribures in vehicle data."""
         obj = vehicle
@@ -432,371 +1111,556 @@ class MinVW:
                 break
         return obj
 
-    async def get_lampstatus(self, vehicle_id, lamptype) -> tuple[str, str]:
-        """Get status of warning lamps."""
-        ret = None
-        time = None
-        data = await self._get_vehicle_data()
-        # vehicles = []
-        for item in data["data"]["viewer"]["vehicles"]:
-            vehicle = item["vehicle"]
-            if vehicle["id"] == vehicle_id:
-                obj = vehicle
-                for lamp in obj["lampStates"]:
-                    # print(lamp)
-                    if lamp["type"] == lamptype:
-                        ret = lamp["enabled"]
-                        time = lamp["time"]
-                        break
-        return ret, time
-
-    async def _get_voltage(self, vehicle_id):
-        ret = None
-        data = await self._get_vehicle_data()
+    def get_cached_lampstatus(self, vehicle_id, lamptype) -> tuple[str, str]:
+        """Get status of warning lamps from the most recently read data."""
+        vehicle = self.get_cached_vehicle_state(vehicle_id)
+        lamp = vehicle.lamps.get(lamptype) if vehicle is not None else None
+        if lamp is None:
+            return None, None
+        return lamp.enabled, lamp.time
+
+    def _parse_vehicles(self, data):
+        """Parse vehicle data of the User query to VehicleState by vehicle id."""
+        vehicles = {}
         for item in data["data"]["viewer"]["vehicles"]:
             vehicle = item["vehicle"]
-            if vehicle["id"] == vehicle_id:
-                ret = vehicle["latestBatteryVoltage"]["voltage"]
+            vehicles[vehicle["id"]] = VehicleState.from_vehicle(
+                vehicle, self._extract_leads(vehicle)
+            )
+        return vehicles
+
+    def _merge_vehicles(self, vehicles, nodes):
+        """Copy vehicle states, merging in the fields of vehicles read again."""
+        merged = dict(vehicles)
+        for vehicle_id, vehicle in nodes.items():
+            if vehicle is not None and vehicle_id in merged:
+                merged[vehicle_id] = merged[vehicle_id].merge(
+                    vehicle, self._extract_leads(vehicle)
+                )
+        return merged
+
+    async def _api_request_vehicles(self, query_name, vehicle_ids, selection):
+        """Request the same selection for several vehicles.
+
+        Vehicles are aliased in one query per batch of bounded size, and the
+        batches are requested concurrently. Returns vehicle nodes by id.
+        """
+        batches = [
+            vehicle_ids[i : i + VEHICLES_PER_QUERY]
+            for i in range(0, len(vehicle_ids), VEHICLES_PER_QUERY)
+        ]
+        requests = []
+        for batch in batches:
+            req_param = f"query {query_name} {{\n"
+            for index, vehicle_id in enumerate(batch):
+                req_param += f"  v{index}: vehicle(id: {vehicle_id}) {{\n"
+                req_param += selection
+                req_param += "  }\n"
+            req_param += "}"
+            requests.append(self.api_request(req_param))
+
+        ret = {}
+        for batch, vehicle_data in zip(
+            batches, await asyncio.gather(*requests), strict=True
+        ):
+            for index, vehicle_id in enumerate(batch):
+                ret[vehicle_id] = self._get_vehicle_value(
+                    vehicle_data, ["data", f"v{index}"]
+                )
         return ret
 
+    async def _get_additional_parameters(self, vehicle_ids):
+        """Request parameters not part of vehicle data, for several vehicles."""
+        req_param = """    totalTripStatistics(period: {first: "%s", last: "%s"}) {mileageInKm, driveDurationInMinutes, numberTrips, longestMileageInKm}
+    serverCalcGpsOdometers(limit: 1, order: DESC){odometer, time}
+    trips(last: 1){items{mileage, gpsMileage, odometerMileage, startOdometer, endOdometer, startTime, endTime, time}}
+"""
+        #     refuelEvents(limit: 1) {time, litersAfter, litersBefore}
+
+        date = datetime.now(UTC)  # datetime.utcnow()
+        req_param = req_param % (
+            (date + relativedelta(months=-2))
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z"),
+            date.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        )
+
+        return await self._api_request_vehicles(
+            "AdditionalParameters", vehicle_ids, req_param
+        )
+
     async def get_vehicle_instances(self, include_additional_parameters=False):
-        """Get vehicle instances and sensor data available."""
-        data = await self._get_vehicle_data()
-        vehicles = []
-        for item in data["data"]["viewer"]["vehicles"]:
-            vehicle = item["vehicle"]
-            vehicle_id = vehicle["id"]
+        """Get vehicle instances and sensor data available.
 
-            # Find lamps for this vehicle
-            lampstates = [lamp["type"] for lamp in vehicle["lampStates"]]
-            # for lamp in vehicle["lampStates"]:
-            #    lampstates.append(lamp["type"])
+        While the restored snapshot has not been replaced by live data, the
+        vehicle instances stored with it are returned without any requests.
+        """
+        key = "additional" if include_additional_parameters else "basic"
+        restored = self._restored_instances
+        if (
+            restored is not None
+            and self._snapshot is not None
+            and self._snapshot is self._restored_snapshot
+            and key in restored
+        ):
+            return restored[key]
+
+        await self._get_vehicle_data()
+        snapshot = self._snapshot
+
+        # Capabilities are found in reads of all fields, only restored data
+        # may not have been read that way yet
+        capabilities = self._capabilities
+        if capabilities is None:
+            capabilities = self._discover_capabilities(snapshot)
+
+        additional = None
+        if include_additional_parameters:
+            additional = await self._get_additional_capabilities(
+                list(snapshot.vehicles)
+            )
+        return self._build_vehicle_instances(snapshot, capabilities, additional)
+
+    def _build_vehicle_instances(self, snapshot, capabilities, additional=None):
+        """Get vehicle instances of a snapshot, in the order of its vehicles."""
+        vehicles = [
+            capabilities[vehicle_id]
+            for vehicle_id in snapshot.vehicles
+            if vehicle_id in capabilities
+        ]
+        if additional is not None:
+            vehicles = [
+                {**vehicle, "has": vehicle["has"] + additional.get(vehicle["id"], [])}
+                for vehicle in vehicles
+            ]
+        return vehicles
+
+    def restored_vehicle_instances_changed(self) -> bool:
+        """Check if live data has other vehicle instances than were restored.
 
+        Checked once, when all fields have been read after a restore. Vehicles
+        added or removed, or other data available, need new entities.
+        """
+        restored = self._restored_instances
+        if restored is None or self._capabilities is None:
+            return False
+        self._restored_instances = None
+        return "basic" in restored and restored["basic"] != (
+            self._build_vehicle_instances(self._snapshot, self._capabilities)
+        )
+
+    def _discover_capabilities(self, snapshot: VehicleDataSnapshot):
+        """Find vehicle instances and sensor data available, by vehicle id.
+
+        Only a snapshot read with all fields shows all data available.
+        """
+        vehicles = {}
+        for vehicle_id, vehicle in snapshot.vehicles.items():
             # Find data availability for sensors
             has = []
-            if (
-                self._get_vehicle_value(vehicle, ["outdoorTemperatures", 0, "celsius"])
-                is not None
-            ):
+            if vehicle.outdoor_temperature is not None:
                 has.append("outdoorTemperature")
-            if (
-                self._get_vehicle_value(vehicle, ["latestBatteryVoltage", "voltage"])
-                is not None
-            ):
+            if vehicle.battery_voltage is not None:
                 has.append("BatteryVoltage")
-            if (
-                self._get_vehicle_value(vehicle, ["fuelPercentage", "percent"])
-                is not None
-            ):
+            if vehicle.fuel_percentage is not None:
                 has.append("fuelPercentage")
-            if self._get_vehicle_value(vehicle, ["fuelLevel", "liter"]) is not None:
+            if vehicle.fuel_level is not None:
                 has.append("fuelLevel")
-            if self._get_vehicle_value(vehicle, ["fuelEconomy"]) is not None:
+            if vehicle.fuel_economy is not None:
                 has.append("fuelEconomy")
-            if self._get_vehicle_value(vehicle, ["odometer", "odometer"]) is not None:
+            if vehicle.odometer is not None:
                 has.append("odometer")
-            if await self.get_next_service_data_predicted(vehicle_id) is not None:
+            if vehicle.next_service_predicted is not None:
                 has.append("NextServicePredicted")
-            if (
-                self._get_vehicle_value(vehicle, ["chargePercentage", "pct"])
-                is not None
-            ):
+            if vehicle.charge_percentage is not None:
                 has.append("EVchargePercentage")
-            if (
-                self._get_vehicle_value(
-                    vehicle, ["highVoltageBatteryTemperature", "celsius"]
-                )
-                is not None
-            ):
+            if vehicle.hv_battery_temperature is not None:
                 has.append("EVHVBattTemp")
-            if self._get_vehicle_value(vehicle, ["rangeTotalKm", "km"]) is not None:
+            if vehicle.range_km is not None:
                 has.append("RangeTotal")
 
-            if self._get_vehicle_value(vehicle, ["ignition", "on"]) is not None:
+            if vehicle.ignition_on is not None:
                 has.append("Ignition")
-            if self._get_vehicle_value(vehicle, ["health", "ok"]) is not None:
+            if vehicle.health_ok is not None:
                 has.append("Health")
 
-            if (
-                self._get_vehicle_value(vehicle, ["position", "latitude"]) is not None
-                and self._get_vehicle_value(vehicle, ["position", "longitude"])
-                is not None
-            ):
+            if vehicle.latitude is not None and vehicle.longitude is not None:
                 has.append("GeoLocation")
 
-            if self._get_vehicle_value(vehicle, ["position", "speed"]) is not None:
+            if vehicle.speed is not None:
                 has.append("Speed")
 
-            if (
-                self._get_vehicle_value(vehicle, ["refuelEvents", 0, "time"])
-                is not None
-            ):
+            if vehicle.refuel_time is not None:
                 has.append("refuelEvents")
 
-            # Request additional parameters
-            if include_additional_parameters:
-                req_param = """query AdditionalParameters {
-vehicle(id: %s) {
-    totalTripStatistics(period: {first: "%s", last: "%s"}) {mileageInKm, driveDurationInMinutes, numberTrips, longestMileageInKm}
-    serverCalcGpsOdometers(limit: 1, order: DESC){odometer, time}
-    trips(last: 1){items{mileage, gpsMileage, odometerMileage, startOdometer, endOdometer, startTime, endTime, time}}
-}}
-                """
-                #     refuelEvents(limit: 1) {time, litersAfter, litersBefore}
+            if self._freshness.get_times(vehicle_id):
+                has.append("lastTelemetry")
+
+            vehicles[vehicle_id] = {
+                "id": vehicle_id,
+                "vin": vehicle.vin,
+                "name": vehicle.name,
+                "make": vehicle.make,
+                "model": vehicle.model,
+                "licensePlate": vehicle.license_plate,
+                "lampStates": list(vehicle.lamps),
+                "has": has,
+            }
+        return vehicles
 
-                date = datetime.now(UTC)  # datetime.utcnow()
+    async def _get_additional_capabilities(self, vehicle_ids):
+        """Find sensor data available from additional parameters, by vehicle id.
 
-                req_param = req_param % (
-                    vehicle_id,
-                    (date + relativedelta(months=-2))
-                    .isoformat(timespec="milliseconds")
-                    .replace("+00:00", "Z"),
-                    date.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
-                )
+        Additional parameters are requested once for vehicles not seen before,
+        only when first needed.
+        """
+        async with self._lock_capabilities:
+            missing = [
+                vehicle_id
+                for vehicle_id in vehicle_ids
+                if vehicle_id not in self._additional_capabilities
+            ]
+            if missing:
+                # Request additional parameters for all vehicles at once
+                additional_parameters = await self._get_additional_parameters(missing)
+                for vehicle_id in missing:
+                    vehicle_data = additional_parameters.get(vehicle_id)
+                    if vehicle_data is None:
+                        # Not cached, so asked again by the next caller
+                        continue
+                    has = []
+                    if (
+                        self._get_vehicle_value(
+                            vehicle_data, ["totalTripStatistics", "mileageInKm"]
+                        )
+                        is not None
+                    ):
+                        has.append("totalTripStatistics")
 
-                vehicle_data = await self.api_request(req_param)
-                if (
-                    self._get_vehicle_value(
-                        vehicle_data,
-                        ["data", "vehicle", "totalTripStatistics", "mileageInKm"],
-                    )
-                    is not None
-                ):
-                    has.append("totalTripStatistics")
+                    if (
+                        self._get_vehicle_value(
+                            vehicle_data, ["serverCalcGpsOdometers", 0, "odometer"]
+                        )
+                        is not None
+                    ):
+                        has.append("serverCalcGpsOdometers")
 
-                if (
-                    self._get_vehicle_value(
-                        vehicle_data,
-                        ["data", "vehicle", "serverCalcGpsOdometers", 0, "odometer"],
-                    )
-                    is not None
-                ):
-                    has.append("serverCalcGpsOdometers")
+                    if (
+                        self._get_vehicle_value(
+                            vehicle_data, ["trips", "items", 0, "time"]
+                        )
+                        is not None
+                    ):
+                        has.append("trips")
+                    self._additional_capabilities[vehicle_id] = has
+            return self._additional_capabilities
 
-                if (
-                    self._get_vehicle_value(
-                        vehicle_data, ["data", "vehicle", "trips", "items", 0, "time"]
-                    )
-                    is not None
-                ):
-                    has.append("trips")
-
-            # Add vehicle to array
-            vehicles.append(
-                {
-                    "id": vehicle_id,
-                    "vin": vehicle["vin"],
-                    "name": vehicle["name"],
-                    "make": vehicle["make"],
-                    "model": vehicle["model"],
-                    "licensePlate": vehicle["licensePlate"],
-                    "lampStates": lampstates,
-                    "has": has,
-                }
-            )
+    def export_vehicle_data(self):
+        """Get the last good vehicle data and vehicle instances for storage.
 
+        Vehicle instances are stored as found in live data once all fields
+        have been read, until then the restored ones are kept.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if self._capabilities is None:
+            vehicle_instances = self._restored_instances or {}
+        else:
+            vehicle_instances = {
+                "basic": self._build_vehicle_instances(snapshot, self._capabilities)
+            }
+            if all(
+                vehicle_id in self._additional_capabilities
+                for vehicle_id in snapshot.vehicles
+            ):
+                vehicle_instances["additional"] = self._build_vehicle_instances(
+                    snapshot, self._capabilities, self._additional_capabilities
+                )
+        return {
+            "vehicles": [vehicle.as_dict() for vehicle in snapshot.vehicles.values()],
+            "vehicle_instances": vehicle_instances,
+            "fuel_economy": [
+                [vehicle_id, fuel_economy.export()]
+                for vehicle_id, fuel_economy in self._fuel_economies.items()
+            ],
+        }
+
+    def restore_vehicle_data(self, stored):
+        """Restore vehicle data from storage, returns the vehicle states.
+
+        The restored snapshot is already expired, so the next read refreshes
+        it, while it is served right away within max_staleness. Vehicle data
+        of the API stored by earlier versions is parsed once.
+        """
+        try:
+            if "vehicles" in stored:
+                vehicles = {
+                    values["id"]: VehicleState.from_dict(values)
+                    for values in stored["vehicles"]
+                }
+            else:
+                vehicles = self._parse_vehicles(stored["data"])
+        except (AttributeError, KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored vehicle data: %s", err)
+            return None
+
+        self._freshness.observe(vehicles)
+        self._observe_odometers(vehicles)
+        self._restored_instances = dict(stored.get("vehicle_instances") or {})
+        try:
+            self._fuel_economies = {
+                vehicle_id: FuelEconomy.restore(fuel_economy)
+                for vehicle_id, fuel_economy in stored.get("fuel_economy") or []
+            }
+        except (AttributeError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored fuel economy: %s", err)
+        self._snapshot = VehicleDataSnapshot(vehicles, datetime.now(UTC))
+        self._restored_snapshot = self._snapshot
         return vehicles
 
     async def _get_vehicle_data(self):
-        """Read data from API."""
+        """Read data from API, returns VehicleState by vehicle id.
+
+        Readers take the current snapshot without locking while it is fresh.
+        Only refreshing it is serialized.
+        """
+        now = datetime.now(UTC)
+        snapshot = self._snapshot
+        if snapshot is not None and now <= snapshot.expires:
+            return snapshot.vehicles
+
+        # Serve expired data while it is refreshed, within the staleness bound
+        if (
+            snapshot is not None
+            and self._max_staleness is not None
+            and now <= snapshot.expires + self._max_staleness
+        ):
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(
+                    self._refresh_vehicle_data_background()
+                )
+            return snapshot.vehicles
 
         async with self._lock_update:
-            if (
-                self._data_expires is None
-                or self._data is None
-                or datetime.now(UTC) > self._data_expires
-            ):
-                self._data_expires = None
-                self._data = None
+            snapshot = self._snapshot
+            if snapshot is None or datetime.now(UTC) > snapshot.expires:
+                snapshot = await self._refresh_or_keep_vehicle_data()
+        return snapshot.vehicles
 
-                req_param = """query User {
-  viewer {
-    vehicles {
-      primary
-      vehicle {
-        odometer {
-          odometer
-          time
-        }
-        odometerOffset
-        id
-        vin
-        licensePlate
-        name
-        brand
-        make
-        model
-        year
-        engineSize
-        avgCO2EmissionKm
-        fuelEconomy
-        fuelType
-        fuelLevel {
-          time
-          liter
-        }
-        refuelEvents(limit: 1) {
-          litersAfter
-          time
-        }
-        fuelTankSize(limit: 1)
-        fuelPercentage {
-          percent
-          time
-        }
-        adblueRemainingKm(limit: 1) {
-          km
-        }
-        chargePercentage {
-          pct
-          time
-        }
-        highVoltageBatteryTemperature {
-          celsius
-          time
-        }
-        rangeTotalKm { km time }
-        ignition {
-          time
-          on
-        }
-        lampStates {
-          type
-          time
-          enabled
-          lampDetails {
-            title
-            subtitle
-          }
-        }
-        outdoorTemperatures(limit: 1) {
-          celsius
-          time
-        }
-        position {
-          latitude
-          longitude
-          speed
-          direction
-          time
-        }
-        service {
-          predictedDate
-        }
-        latestBatteryVoltage {
-          voltage
-          time
-        }
-        health { ok }
-        leads(statuses: [open], orderBy: {field: created_at, direction: DESC}) {
-          type
-          status
-          interactions{time, channel}
-          severityScore
-          value{amount, currency}
-          createdTime
-          updatedTime
-          lastActivityTime
-          bookingTime
-          lastContactedTime
-          context {
-            ... on LeadErrorCodeContext {
-                errorCode, ecu, provider, errorCodeCount, description, severity, firstErrorCodeTime, lastErrorCodeTime
-            }
-            ... on LeadLowBatteryVoltageContext {
-                sourceMedianVoltage { voltage }
-            }
-            ... on LeadServiceReminderContext {
-                serviceDate, oilEstimateUncertain, sourceData { type, value }
-            }
-            ... on  LeadConnectivityIssueContext{
-                latestVehiclePositionRecordTime
-            }
-            ... on  LeadEngineLampContext{
-                lamps { type, color, title, subtitle, recommendationText, descriptionTitle, descriptionText }
-            }
-            ... on LeadMainPowerDisconnectContext{
-                disconnectionEventTime, disconnectionLatitude, disconnectionLongitude, disconnectionPositionTime, unitConnectionState, lastConnectionEventTime, incidentCount
-            }
-            ... on LeadDefaultContext{
-              context
-            }
-            ... on LeadRapidBatteryDischargeContext{
-               time, durationHours, minVoltage, maxVoltage, voltageDrop
-            }
-            ... on LeadQuoteContext{
-				quote{workshop{name},title,price{amount, currency},expirationDate,status}
-            }
-            ... on UserReportedLampLeadContext{
-				type, color, frequency, source
-            }
-          }
-        }
+    async def _refresh_vehicle_data_background(self):
+        """Refresh vehicle data in the background and notify listeners."""
+        try:
+            async with self._lock_update:
+                snapshot = self._snapshot
+                if snapshot is None or datetime.now(UTC) > snapshot.expires:
+                    snapshot = await self._refresh_or_keep_vehicle_data()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Background refresh of vehicle data failed: %s", err)
+            _LOGGER.debug("%s", traceback.format_exc())
+            return
 
-      }
-    }
-  }
-}
-          """
-                req_body = {"query": req_param}
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                    "x-organization-namespace": f"semler:{self._namespace}",
-                    "User-Agent": "ConnectedCars/360 CFNetwork/978.0.7 Darwin/18.7.0",
-                    "Authorization": f"Bearer {await self._get_access_token()}",
-                }
+        for listener in list(self._refresh_listeners):
+            listener(snapshot.vehicles)
 
-                req_url = self._base_url_graph + "graphql"
+    def set_requested_fields(self, fields):
+        """Limit vehicle fields read after the first read, None reads all.
 
-                # async with aiohttp.ClientSession() as session:
-                #     async with session.post(
-                #         req_url, json=req_body, headers=headers
-                #     ) as response:
-                async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(req_url, json=req_body, headers=headers) as response,
-                ):
-                    self._data = await response.json()
-                    # self._data = json.loads('')
-                    _LOGGER.debug("Got vehicle data: %s", json.dumps(self._data))
-
-                    # Does any car have ignition?
-                    expire_time = 4.75
-                    for item in self._data["data"]["viewer"]["vehicles"]:
-                        vehicle = item["vehicle"]
-                        # id = vehicle["id"]
-                        ignition = self._get_vehicle_value(
-                            vehicle, ["ignition", "on"]
-                        )  # Preferred to check this only, but it seems to be delayed
-                        speed = self._get_vehicle_value(vehicle, ["position", "speed"])
-                        speed = speed if speed is not None else 0
-                        if bool(ignition) is True or speed > 0:  # ignition == True
-                            expire_time = 0.75  # At least one car has ignition/moving
-                            break
-                    self._data_expires = datetime.now(UTC) + timedelta(
-                        minutes=expire_time
+        Names are keys of VEHICLE_FIELDS. REQUIRED_FIELDS are always read.
+        """
+        fields = frozenset(fields) if fields is not None else None
+        if fields != self._requested_fields:
+            _LOGGER.debug("Requested vehicle fields: %s", fields)
+            self._requested_fields = fields
+
+    def add_refresh_listener(self, listener):
+        """Register a callback for vehicle data refreshed in the background.
+
+        Returns a function removing the listener again.
+        """
+        self._refresh_listeners.append(listener)
+
+        def remove_listener():
+            self._refresh_listeners.remove(listener)
+
+        return remove_listener
+
+    async def _refresh_or_keep_vehicle_data(self):
+        """Refresh vehicle data, keeping the last snapshot while API is down.
+
+        While the circuit breaker is open, the last good snapshot is served
+        until the breaker lets a trial request through, instead of failing.
+        """
+        try:
+            return await self._refresh_vehicle_data()
+        except Exception:
+            snapshot = self._snapshot
+            if snapshot is None or not self._circuit_breaker.is_open:
+                raise
+            _LOGGER.debug(
+                "Serving last vehicle data until %s",
+                self._circuit_breaker.open_until.isoformat(),
+            )
+            self._snapshot = snapshot._replace(expires=self._circuit_breaker.open_until)
+            return self._snapshot
+
+    async def _refresh_vehicle_data(self):
+        """Refresh vehicle fields that are due and replace the snapshot.
+
+        All fields of all vehicles of the account are read with the User query
+        at first and every FULL_REFRESH_INTERVAL, which also finds added or
+        removed vehicles. In between, only the tiers of fields due according to
+        each vehicle's poll state are read, with targeted vehicle(id:) requests
+        merged into copies of the previous vehicle states.
+        """
+        now = datetime.now(UTC)
+        snapshot = self._snapshot
+        refreshed = {}
+        failed = {}
+        all_fields = False
+        if (
+            snapshot is None
+            or self._full_refresh_due is None
+            or now >= self._full_refresh_due
+        ):
+            # All fields are read until the data available is known for all
+            # vehicles, i.e. at first and when a vehicle was added
+            all_fields = self._capabilities is None
+            data = await self._request_user_data(
+                None if all_fields else self._requested_fields
+            )
+            if not all_fields and any(
+                item["vehicle"]["id"] not in self._capabilities
+                for item in data["data"]["viewer"]["vehicles"]
+            ):
+                all_fields = True
+                data = await self._request_user_data()
+            vehicles = self._parse_vehicles(data)
+            refreshed = None
+            self._full_refresh_due = now + FULL_REFRESH_INTERVAL
+        else:
+            # Vehicles due for the same tiers are requested together. Tiers
+            # without any requested fields are considered refreshed right away.
+            groups = {}
+            for vehicle_id, poll_state in self._poll_states.items():
+                tiers = poll_state.due_tiers(now)
+                if tiers:
+                    refreshed[vehicle_id] = tiers
+                    selection = build_vehicle_selection(tiers, self._requested_fields)
+                    if selection is not None:
+                        groups.setdefault(selection, []).append(vehicle_id)
+
+            vehicles = snapshot.vehicles
+            if groups:
+                _LOGGER.debug("Refreshing vehicles: %s", refreshed)
+                nodes = {}
+                for result in await asyncio.gather(
+                    *(
+                        self._api_request_vehicles("Vehicles", vehicle_ids, selection)
+                        for selection, vehicle_ids in groups.items()
                     )
+                ):
+                    nodes.update(result)
+                failed = {
+                    vehicle_id: refreshed.pop(vehicle_id)
+                    for vehicle_id in list(refreshed)
+                    if vehicle_id in nodes and nodes[vehicle_id] is None
+                }
+                vehicles = self._merge_vehicles(vehicles, nodes)
 
-                # result = requests.post(req_url, json = req_body, headers = headers)
-                # print(result)
-                # result_json = result.json()
-                # print(result_json['data']['viewer']['vehicles'])
+        self._freshness.observe(vehicles)
+        self._observe_odometers(vehicles)
+        await self._observe_refuels(vehicles)
 
-                # for item in self._data['data']['viewer']['vehicles']:
-                #   vehicle = item['vehicle']
-                #   print(f"Primary: {item['primary']}")
-                #   print(f"Name:    {vehicle['name']}")
-                #   print(f"LicPlat: {vehicle['licensePlate']}")
+        # Forget vehicles no longer on the account
+        self._poll_states = {
+            vehicle_id: poll_state
+            for vehicle_id, poll_state in self._poll_states.items()
+            if vehicle_id in vehicles
+        }
+        for vehicle_id, vehicle in vehicles.items():
+            poll_state = self._poll_states.setdefault(
+                vehicle_id, VehiclePollState(vehicle_id)
+            )
+            if vehicle_id in failed:
+                poll_state.retry(now, failed[vehicle_id])
+            elif refreshed is None:
+                poll_state.update(vehicle, now)
+            elif vehicle_id in refreshed:
+                poll_state.update(vehicle, now, refreshed[vehicle_id])
+
+        expires = min(
+            [self._full_refresh_due]
+            + [
+                self._poll_states[vehicle_id].next_due or now
+                for vehicle_id in vehicles
+            ]
+        )
 
-        return self._data
+        # Replace the snapshot in one assignment, readers never see partial data
+        self._snapshot = VehicleDataSnapshot(vehicles, expires)
+        if all_fields:
+            self._capabilities = self._discover_capabilities(self._snapshot)
+        return self._snapshot
+
+    async def _request_user_data(self, fields=None):
+        """Request data of all vehicles of the account."""
+        data = await self._send_query(build_vehicles_query(fields))
+        _LOGGER.debug("Got vehicle data: %s", data)
+        if self._get_vehicle_value(data, ["data", "viewer", "vehicles"]) is None:
+            raise ApiError(f"No vehicle data in response: {data.get('errors')}")
+        return data
 
     async def _get_access_token(self):
+        """Get access token, authenticating when it has expired."""
+        if (
+            self._accesstoken is not None
+            and self._at_expires is not None
+            and datetime.now(UTC) <= self._at_expires
+        ):
+            return self._accesstoken
+
+        # Concurrent callers wait for a single login
+        async with self._lock_token:
+            return await self._authenticate()
+
+    async def renew_access_token(self):
+        """Get a new access token before the current one expires.
+
+        The current token stays in use until the new one is received, so
+        requests meanwhile do not wait for the login.
+        """
+        async with self._lock_token:
+            return await self._authenticate(renew=True)
+
+    def set_access_token(self, token, expires: datetime):
+        """Use an access token obtained earlier, e.g. restored from storage."""
+        self._accesstoken = token
+        self._at_expires = expires
+
+    @property
+    def access_token_expires(self):
+        """Time when the access token must be renewed."""
+        return self._at_expires
+
+    def add_token_listener(self, listener):
+        """Register a callback for new access tokens, called with token and expiry.
+
+        Returns a function removing the listener again.
+        """
+        self._token_listeners.append(listener)
+
+        def remove_listener():
+            self._token_listeners.remove(listener)
+
+        return remove_listener
+
+    async def _authenticate(self, renew=False):
         """Authenticate to get access token."""
 
         if (
-            self._accesstoken is None
+            renew
+            or self._accesstoken is None
             or self._at_expires is None
             or datetime.now(UTC) > self._at_expires
         ):
@@ -810,8 +1674,9 @@ vehicle(id: %s) {
 
             # Authenticate
             try:
-                self._accesstoken = None
-                self._at_expires = None
+                if not renew:
+                    self._accesstoken = None
+                    self._at_expires = None
                 result_json = None
 
                 _LOGGER.debug("Getting access token...")
@@ -824,8 +1689,10 @@ vehicle(id: %s) {
                 #     ) as response:
                 #         result_json = await response.json()
                 async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(auth_url, json=body, headers=headers) as response,
+                    self._scheduler.slot(),
+                    self._get_session().post(
+                        auth_url, json=body, headers=headers, timeout=REQUEST_TIMEOUT
+                    ) as response,
                 ):
                     result_json = await response.json()
 
@@ -843,6 +1710,8 @@ vehicle(id: %s) {
                         seconds=int(result_json["expires"]) - 120
                     )
                     _LOGGER.debug("Got access token: %s...", self._accesstoken[:10])
+                    for listener in list(self._token_listeners):
+                        listener(self._accesstoken, self._at_expires)
                 if (
                     result_json is not None
                     and "error" in result_json
@@ -0,0 +1,249 @@
+"""Parsed connectedcars.io vehicle data."""
+
+from dataclasses import dataclass, fields, replace
+from datetime import date, datetime
+
+from .freshness import parse_time
+
+
+def _get(node, *selector):
+    """Get selected value of a vehicle node, None if missing."""
+    for sel in selector:
+        if isinstance(node, dict):
+            node = node.get(sel)
+        elif isinstance(node, list) and isinstance(sel, int) and sel < len(node):
+            node = node[sel]
+        else:
+            return None
+    return node
+
+
+def _float(value):
+    """Convert a numeric value that may be sent as text."""
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    if isinstance(value, (float, int)):
+        return value
+    return None
+
+
+def _date(value):
+    """Parse a date of the API."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+# Attributes of VehicleState by the vehicle field of the API they come from.
+# The attribute ending in _time is the time the field was measured.
+FIELD_ATTRIBUTES = {
+    "position": ("latitude", "longitude", "speed", "direction", "position_time"),
+    "ignition": ("ignition_on", "ignition_time"),
+    "odometer": ("odometer", "odometer_time"),
+    "fuelEconomy": ("fuel_economy",),
+    "fuelLevel": ("fuel_level", "fuel_level_time"),
+    "refuelEvents": ("refuel_time", "refuel_liters_before", "refuel_liters_after"),
+    "fuelPercentage": ("fuel_percentage", "fuel_percentage_time"),
+    "chargePercentage": ("charge_percentage", "charge_percentage_time"),
+    "highVoltageBatteryTemperature": (
+        "hv_battery_temperature",
+        "hv_battery_temperature_time",
+    ),
+    "rangeTotalKm": ("range_km", "range_time"),
+    "outdoorTemperatures": ("outdoor_temperature", "outdoor_temperature_time"),
+    "latestBatteryVoltage": ("battery_voltage", "battery_voltage_time"),
+    "health": ("health_ok",),
+    "vin": ("vin",),
+    "licensePlate": ("license_plate",),
+    "name": ("name",),
+    "make": ("make",),
+    "model": ("model",),
+    "service": ("next_service_predicted",),
+    "lampStates": ("lamps",),
+    "leads": ("leads",),
+}
+TIME_ATTRIBUTES = {
+    field: attribute
+    for field, attributes in FIELD_ATTRIBUTES.items()
+    for attribute in attributes
+    if attribute.endswith("_time")
+}
+
+
+def _field_times(values) -> dict:
+    """Parse the times fields were measured, by field."""
+    times = {}
+    for field, attribute in TIME_ATTRIBUTES.items():
+        text = values.get(attribute)
+        time = parse_time(text) if isinstance(text, str) else None
+        if time is not None:
+            times[field] = time
+    return times
+
+
+@dataclass(slots=True, frozen=True)
+class LampState:
+    """State of one warning lamp."""
+
+    enabled: bool | None
+    time: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class VehicleState:
+    """Values of one vehicle, parsed once from vehicle data of the API.
+
+    Times ending in _time are kept as sent by the API, as they are shown in
+    attributes. field_times holds them parsed, by vehicle field. Vehicle data
+    is not kept, fields read again are merged into a copy.
+    """
+
+    id: int
+    vin: str | None
+    license_plate: str | None
+    name: str | None
+    make: str | None
+    model: str | None
+    ignition_on: bool | None
+    ignition_time: str | None
+    latitude: float | None
+    longitude: float | None
+    speed: float | None
+    direction: float | None
+    position_time: str | None
+    odometer: float | None
+    odometer_time: str | None
+    fuel_level: float | None
+    fuel_level_time: str | None
+    fuel_percentage: float | None
+    fuel_percentage_time: str | None
+    fuel_economy: float | None
+    refuel_time: str | None
+    refuel_liters_before: float | None
+    refuel_liters_after: float | None
+    charge_percentage: float | None
+    charge_percentage_time: str | None
+    hv_battery_temperature: float | None
+    hv_battery_temperature_time: str | None
+    range_km: float | None
+    range_time: str | None
+    outdoor_temperature: float | None
+    outdoor_temperature_time: str | None
+    battery_voltage: float | None
+    battery_voltage_time: str | None
+    health_ok: bool | None
+    next_service_predicted: date | None
+    lamps: dict
+    leads: tuple
+    field_times: dict
+
+    @property
+    def ignition_changed(self) -> datetime | None:
+        """Time the ignition was last switched."""
+        return self.field_times.get("ignition")
+
+    @classmethod
+    def from_vehicle(cls, vehicle, leads=()):
+        """Extract values from a vehicle node of the API."""
+        values = cls._values(vehicle, leads)
+        return cls(id=vehicle["id"], **values, field_times=_field_times(values))
+
+    def merge(self, vehicle, leads=()):
+        """Get a copy with the fields of a vehicle node read again replaced."""
+        values = self._values(vehicle, leads)
+        read = [field for field in vehicle if field in FIELD_ATTRIBUTES]
+        changes = {
+            attribute: values[attribute]
+            for field in read
+            for attribute in FIELD_ATTRIBUTES[field]
+        }
+        field_times = {
+            field: time for field, time in self.field_times.items() if field not in read
+        }
+        field_times.update(_field_times(changes))
+        return replace(self, **changes, field_times=field_times)
+
+    def as_dict(self) -> dict:
+        """Get values in a form that can be stored as JSON."""
+        values = {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if field.name != "field_times"
+        }
+        if self.next_service_predicted is not None:
+            values["next_service_predicted"] = self.next_service_predicted.isoformat()
+        values["lamps"] = {
+            lamp_type: [lamp.enabled, lamp.time]
+            for lamp_type, lamp in self.lamps.items()
+        }
+        values["leads"] = list(self.leads)
+        return values
+
+    @classmethod
+    def from_dict(cls, values):
+        """Restore values stored with as_dict()."""
+        values = {
+            **values,
+            "next_service_predicted": _date(values.get("next_service_predicted")),
+            "lamps": {
+                lamp_type: LampState(*lamp)
+                for lamp_type, lamp in (values.get("lamps") or {}).items()
+            },
+            "leads": tuple(values.get("leads") or ()),
+        }
+        return cls(**values, field_times=_field_times(values))
+
+    @staticmethod
+    def _values(vehicle, leads):
+        """Extract values of all fields from a vehicle node, None if missing."""
+        return dict(
+            vin=vehicle.get("vin"),
+            license_plate=vehicle.get("licensePlate"),
+            name=vehicle.get("name"),
+            make=vehicle.get("make"),
+            model=vehicle.get("model"),
+            ignition_on=_get(vehicle, "ignition", "on"),
+            ignition_time=_get(vehicle, "ignition", "time"),
+            latitude=_float(_get(vehicle, "position", "latitude")),
+            longitude=_float(_get(vehicle, "position", "longitude")),
+            speed=_get(vehicle, "position", "speed"),
+            direction=_get(vehicle, "position", "direction"),
+            position_time=_get(vehicle, "position", "time"),
+            odometer=_get(vehicle, "odometer", "odometer"),
+            odometer_time=_get(vehicle, "odometer", "time"),
+            fuel_level=_get(vehicle, "fuelLevel", "liter"),
+            fuel_level_time=_get(vehicle, "fuelLevel", "time"),
+            fuel_percentage=_get(vehicle, "fuelPercentage", "percent"),
+            fuel_percentage_time=_get(vehicle, "fuelPercentage", "time"),
+            fuel_economy=_get(vehicle, "fuelEconomy"),
+            refuel_time=_get(vehicle, "refuelEvents", 0, "time"),
+            refuel_liters_before=_float(
+                _get(vehicle, "refuelEvents", 0, "litersBefore")
+            ),
+            refuel_liters_after=_float(_get(vehicle, "refuelEvents", 0, "litersAfter")),
+            charge_percentage=_get(vehicle, "chargePercentage", "pct"),
+            charge_percentage_time=_get(vehicle, "chargePercentage", "time"),
+            hv_battery_temperature=_get(
+                vehicle, "highVoltageBatteryTemperature", "celsius"
+            ),
+            hv_battery_temperature_time=_get(
+                vehicle, "highVoltageBatteryTemperature", "time"
+            ),
+            range_km=_get(vehicle, "rangeTotalKm", "km"),
+            range_time=_get(vehicle, "rangeTotalKm", "time"),
+            outdoor_temperature=_get(vehicle, "outdoorTemperatures", 0, "celsius"),
+            outdoor_temperature_time=_get(vehicle, "outdoorTemperatures", 0, "time"),
+            battery_voltage=_get(vehicle, "latestBatteryVoltage", "voltage"),
+            battery_voltage_time=_get(vehicle, "latestBatteryVoltage", "time"),
+            health_ok=_get(vehicle, "health", "ok"),
+            next_service_predicted=_date(_get(vehicle, "service", "predictedDate")),
+            lamps={
+                lamp["type"]: LampState(lamp.get("enabled"), lamp.get("time"))
+                for lamp in vehicle.get("lampStates") or []
+            },
+            leads=tuple(leads),
+        )
@@ -0,0 +1,70 @@
+"""Odometer history of connectedcars.io vehicles."""
+
+from bisect import bisect_left, bisect_right
+from datetime import UTC, datetime
+
+
+class OdometerIndex:
+    """Sorted odometer samples of one vehicle, from trips and vehicle data.
+
+    Odometer at a time is found by binary search. Within a trip it is
+    interpolated between the samples around it. Outside trips the car is
+    parked, so the last sample before the time applies.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._times = []
+        self._odometers = []
+        self._trip_starts = []
+        self._trip_ends = []
+
+    def add(self, time: datetime, odometer):
+        """Add an odometer sample, replacing one at the same time."""
+        if time is None or odometer is None:
+            return
+        time = time.astimezone(UTC)
+        index = bisect_left(self._times, time)
+        if index < len(self._times) and self._times[index] == time:
+            self._odometers[index] = odometer
+        else:
+            self._times.insert(index, time)
+            self._odometers.insert(index, odometer)
+
+    def add_trip(self, start: datetime, end: datetime, start_odometer, end_odometer):
+        """Add samples at the start and end of a trip."""
+        self.add(start, start_odometer)
+        self.add(end, end_odometer)
+
+        start, end = start.astimezone(UTC), end.astimezone(UTC)
+        index = bisect_left(self._trip_starts, start)
+        if index < len(self._trip_starts) and self._trip_starts[index] == start:
+            self._trip_ends[index] = end
+        else:
+            self._trip_starts.insert(index, start)
+            self._trip_ends.insert(index, end)
+
+    def _in_trip(self, time: datetime) -> bool:
+        """Check if a time is within a known trip."""
+        index = bisect_right(self._trip_starts, time)
+        return index > 0 and time < self._trip_ends[index - 1]
+
+    def get_odometer_at(self, time: datetime):
+        """Get odometer at a time, None if outside the samples."""
+        time = time.astimezone(UTC)
+        index = bisect_right(self._times, time)
+        if index == 0:
+            return None
+        if self._times[index - 1] == time:
+            return self._odometers[index - 1]
+        if index == len(self._times):
+            return None
+
+        odometer_before = self._odometers[index - 1]
+        if not self._in_trip(time):
+            return odometer_before
+
+        time_before, time_after = self._times[index - 1], self._times[index]
+        odometer_after = self._odometers[index]
+        share = (time - time_before) / (time_after - time_before)
+        return odometer_before + (odometer_after - odometer_before) * share
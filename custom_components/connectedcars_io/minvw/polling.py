@@ -0,0 +1,113 @@
+"""Adaptive polling of connectedcars.io vehicles."""
+
+from datetime import datetime, timedelta
+import logging
+
+from .model import VehicleState
+
+_LOGGER = logging.getLogger(__name__)
+
+DRIVING = "driving"
+RECENTLY_PARKED = "recently_parked"
+PARKED = "parked"
+LONG_TERM_PARKED = "long_term_parked"
+
+# Refresh interval of each state, before backoff
+POLL_INTERVALS = {
+    DRIVING: timedelta(minutes=0.75),
+    RECENTLY_PARKED: timedelta(minutes=2),
+    PARKED: timedelta(minutes=4.75),
+    LONG_TERM_PARKED: timedelta(minutes=15),
+}
+# Interval is doubled for each refresh without changes, up to this factor
+MAX_BACKOFF_FACTOR = {
+    DRIVING: 1,
+    RECENTLY_PARKED: 2,
+    PARKED: 4,
+    LONG_TERM_PARKED: 4,
+}
+RECENTLY_PARKED_DURATION = timedelta(minutes=30)
+LONG_TERM_PARKED_DURATION = timedelta(days=2)
+
+# Field tiers, refreshed independently
+TIER_LIVE = "live"
+TIER_STATUS = "status"
+TIER_SLOW = "slow"
+TIERS = (TIER_LIVE, TIER_STATUS, TIER_SLOW)
+
+# Shortest interval of each tier. The live tier follows the poll state, the
+# other tiers are refreshed at the poll state's interval or this, if longer.
+TIER_INTERVALS = {
+    TIER_LIVE: timedelta(0),
+    TIER_STATUS: timedelta(minutes=4.75),
+    TIER_SLOW: timedelta(hours=1),
+}
+
+
+class VehiclePollState:
+    """Decide when fields of a single vehicle are due for a refresh."""
+
+    def __init__(self, vehicle_id) -> None:
+        """Initialize."""
+        self.vehicle_id = vehicle_id
+        self.state = None
+        self.backoff_factor = 1
+        self.tier_due = {}
+        self._previous = None
+
+    @property
+    def next_due(self):
+        """Time when the first tier is due."""
+        if len(self.tier_due) < len(TIERS):
+            return None
+        return min(self.tier_due.values())
+
+    def due_tiers(self, now: datetime):
+        """Get tiers that should be refreshed."""
+        return frozenset(
+            tier
+            for tier in TIERS
+            if tier not in self.tier_due or now >= self.tier_due[tier]
+        )
+
+    def update(self, vehicle: VehicleState, now: datetime, tiers=TIERS):
+        """Update state from freshly read vehicle data and schedule next refresh."""
+        state = self._evaluate_state(vehicle, now)
+
+        if TIER_LIVE in tiers:
+            if state != self.state or vehicle != self._previous:
+                self.backoff_factor = 1
+            else:
+                self.backoff_factor = min(
+                    self.backoff_factor * 2, MAX_BACKOFF_FACTOR[state]
+                )
+            self._previous = vehicle
+        if state != self.state:
+            _LOGGER.debug("Vehicle %s is now %s", self.vehicle_id, state)
+            self.backoff_factor = 1
+        self.state = state
+
+        interval = POLL_INTERVALS[state] * self.backoff_factor
+        for tier in tiers:
+            self.tier_due[tier] = now + max(interval, TIER_INTERVALS[tier])
+
+    def retry(self, now: datetime, tiers=TIERS):
+        """Schedule a new attempt after a failed refresh."""
+        for tier in tiers:
+            self.tier_due[tier] = now + max(
+                POLL_INTERVALS[self.state or PARKED], TIER_INTERVALS[tier]
+            )
+
+    def _evaluate_state(self, vehicle: VehicleState, now: datetime):
+        """Find state from ignition, speed and time since ignition changed."""
+        if bool(vehicle.ignition_on) is True or (vehicle.speed or 0) > 0:
+            return DRIVING
+
+        parked_since = vehicle.ignition_changed
+        if parked_since is None:
+            return PARKED
+        if now - parked_since < RECENTLY_PARKED_DURATION:
+            return RECENTLY_PARKED
+        if now - parked_since > LONG_TERM_PARKED_DURATION:
+            return LONG_TERM_PARKED
+        return PARKED
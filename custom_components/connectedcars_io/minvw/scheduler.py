@@ -0,0 +1,36 @@
+"""Scheduling of connectedcars.io API requests."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestScheduler:
+    """Bound concurrency and rate of the API requests of one account.
+
+    Independent requests run concurrently up to max_concurrent, and request
+    starts are spaced to at most requests_per_second.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_second: float) -> None:
+        """Initialize."""
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._min_interval = 1 / requests_per_second
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot, and hold it while sending a request."""
+        async with self._semaphore:
+            # Reserve the next start time without awaiting, so concurrent
+            # requests are spaced in the order they got their slot
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start)
+            self._next_start = start + self._min_interval
+            if start > now:
+                _LOGGER.debug("Delaying request %.2f s by rate limit", start - now)
+                await asyncio.sleep(start - now)
+            yield
@@ -0,0 +1,106 @@
+"""Failure handling of connectedcars.io API requests."""
+
+from datetime import UTC, datetime, timedelta
+from email.utils import parsedate_to_datetime
+import logging
+import random
+
+_LOGGER = logging.getLogger(__name__)
+
+# Responses worth sending the same query again for
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class ApiError(Exception):
+    """API request failed."""
+
+
+class ApiUnavailableError(ApiError):
+    """API is considered unavailable, requests are not sent."""
+
+
+def backoff_delay(attempt: int, base: timedelta, cap: timedelta) -> timedelta:
+    """Get a random delay before retry number attempt, growing exponentially.
+
+    Random ("full") jitter keeps clients failing together from retrying
+    together.
+    """
+    ceiling = min(cap, base * 2**attempt)
+    return ceiling * random.random()
+
+
+def retry_after(headers) -> timedelta | None:
+    """Get delay requested by a Retry-After header, in seconds or as a date."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return timedelta(seconds=max(0, int(value)))
+    except ValueError:
+        pass
+    try:
+        return max(timedelta(0), parsedate_to_datetime(value) - datetime.now(UTC))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Stop sending requests for a while after repeated failures.
+
+    After failure_threshold failed requests in a row the circuit opens for
+    open_duration. Then one trial request is let through, which closes the
+    circuit on success or opens it again on failure.
+    """
+
+    def __init__(self, failure_threshold: int, open_duration: timedelta) -> None:
+        """Initialize."""
+        self._failure_threshold = failure_threshold
+        self._open_duration = open_duration
+        self._failures = 0
+        self._open_until = None
+
+    @property
+    def is_open(self) -> bool:
+        """Check if requests are currently not sent."""
+        return self._open_until is not None and datetime.now(UTC) < self._open_until
+
+    @property
+    def open_until(self) -> datetime | None:
+        """Time when the next trial request is let through."""
+        return self._open_until
+
+    def check(self):
+        """Raise ApiUnavailableError if requests should not be sent now."""
+        if self._open_until is None:
+            return
+        if self.is_open:
+            raise ApiUnavailableError(
+                f"API unavailable, retrying after {self._open_until.isoformat()}"
+            )
+        # Half-open: let this request through as trial, and fail the others
+        # until it has finished
+        self._open_until = datetime.now(UTC) + self._open_duration
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        if self._open_until is not None:
+            _LOGGER.info("API available again")
+        self._failures = 0
+        self._open_until = None
+
+    def record_failure(self):
+        """Count a failed request, opening the circuit at the threshold."""
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self.trip(self._open_duration)
+
+    def trip(self, duration: timedelta):
+        """Open the circuit for at least duration."""
+        open_until = datetime.now(UTC) + duration
+        if self._open_until is None or open_until > self._open_until:
+            if not self.is_open:
+                _LOGGER.warning(
+                    "API unavailable, pausing requests until %s",
+                    open_until.isoformat(),
+                )
+            self._open_until = open_until
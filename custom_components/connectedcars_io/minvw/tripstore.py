@@ -0,0 +1,151 @@
+"""Local store of connectedcars.io trips."""
+
+from datetime import UTC
+from pathlib import Path
+import sqlite3
+import threading
+
+from .freshness import parse_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    vehicle_id INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    mileage REAL,
+    start_odometer REAL,
+    end_odometer REAL,
+    PRIMARY KEY (vehicle_id, start_time)
+);
+CREATE INDEX IF NOT EXISTS trips_end_time ON trips (vehicle_id, end_time);
+CREATE TABLE IF NOT EXISTS sync (
+    vehicle_id INTEGER PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    cursor TEXT NOT NULL
+);
+"""
+
+
+def normalize_time(value) -> str | None:
+    """Format a time of the API or a datetime as comparable UTC text."""
+    if isinstance(value, str):
+        value = parse_time(value)
+    if value is None:
+        return None
+    return value.astimezone(UTC).isoformat(timespec="milliseconds")
+
+
+def api_time(text: str) -> str:
+    """Format stored time text as sent by the API."""
+    return text.replace("+00:00", "Z")
+
+
+class TripStore:
+    """SQLite log of completed trips of each vehicle.
+
+    Trips are synced incrementally: the cursor of a vehicle is the end time
+    of its newest stored trip, and covered_from the earliest time trips were
+    requested from. Methods block, MinVW runs them in an executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize, the database is opened on first use."""
+        self._path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get connection, creating the database if needed."""
+        if self._connection is None:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get_sync_state(self, vehicle_id) -> tuple[str, str] | None:
+        """Get (covered_from, cursor) of a vehicle, None if never synced."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT covered_from, cursor FROM sync WHERE vehicle_id = ?",
+                    (vehicle_id,),
+                )
+                .fetchone()
+            )
+        return (row["covered_from"], row["cursor"]) if row is not None else None
+
+    def add_trips(self, vehicle_id, trips, covered_from: str, cursor: str):
+        """Store trips of the API and move the cursor, in one transaction."""
+        rows = []
+        for trip in trips:
+            start_time = normalize_time(trip.get("startTime"))
+            end_time = normalize_time(trip.get("endTime"))
+            if start_time is None or end_time is None:
+                continue
+            rows.append(
+                (
+                    vehicle_id,
+                    start_time,
+                    end_time,
+                    trip.get("mileage"),
+                    trip.get("startOdometer"),
+                    trip.get("endOdometer"),
+                )
+            )
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO trips VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync VALUES (?, ?, ?)",
+                    (vehicle_id, covered_from, cursor),
+                )
+        return len(rows)
+
+    def get_trips(self, vehicle_id, since: str = None) -> list[dict]:
+        """Get stored trips of a vehicle, oldest first."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT * FROM trips WHERE vehicle_id = ? AND start_time >= ?"
+                    " ORDER BY start_time",
+                    (vehicle_id, since or ""),
+                )
+                .fetchall()
+            )
+        return [dict(row) for row in rows]
+
+    def get_trip_at(self, vehicle_id, time: str) -> dict | None:
+        """Get the first trip starting at or after time, in the API's format."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT * FROM trips WHERE vehicle_id = ? AND start_time >= ?"
+                    " ORDER BY start_time LIMIT 1",
+                    (vehicle_id, time),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return {
+            "mileage": row["mileage"],
+            "startOdometer": row["start_odometer"],
+            "endOdometer": row["end_odometer"],
+            "startTime": api_time(row["start_time"]),
+            "endTime": api_time(row["end_time"]),
+            "time": api_time(row["start_time"]),
+        }
@@ -24,14 +24,42 @@ from homeassistant.const import (
 )
 
 # from homeassistant.helpers.entity import Entity
+from homeassistant.core import callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=1)
+# Mileage sensors and the trip statistics window they show
+MILEAGE_ITEMS = {
+    "mileage latest year": "year",
+    "mileage latest quarter": "quarter",
+    "mileage latest month": "month",
+    "mileage latest week": "week",
+}
+
+# Vehicle fields read by each sensor
+ITEM_FIELDS = {
+    "outdoorTemperature": ("outdoorTemperatures",),
+    "BatteryVoltage": ("latestBatteryVoltage",),
+    "fuelPercentage": ("fuelPercentage",),
+    "fuelLevel": ("fuelLevel",),
+    "odometer": ("odometer",),
+    "fuel economy": ("fuelEconomy",),
+    "average fuel economy": ("refuelEvents", "fuelLevel", "odometer"),
+    "NextServicePredicted": ("service",),
+    "EVchargePercentage": ("chargePercentage",),
+    "EVHVBattTemp": ("highVoltageBatteryTemperature",),
+    "Range": ("rangeTotalKm",),
+    "Speed": ("position",),
+    "mileage since refuel": ("refuelEvents", "odometer"),
+}
+
+# Sensors needing additional API requests besides the coordinator's vehicle data
+API_ITEMS = (*MILEAGE_ITEMS, "mileage since refuel")
 
 
 async def async_setup_entry(
@@ -43,6 +71,7 @@ async def async_setup_entry(
     config = hass.data[DOMAIN][config_entry.entry_id]
 
     _connectedcarsclient = config["connectedcarsclient"]
+    _coordinator = config["coordinator"]
 
     try:
         sensors = []
@@ -52,63 +81,127 @@ async def async_setup_entry(
             if "outdoorTemperature" in vehicle["has"]:
                 sensors.append(
                     MinVwEntity(
-                        vehicle, "outdoorTemperature", True, _connectedcarsclient
+                        vehicle,
+                        "outdoorTemperature",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
             if "BatteryVoltage" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "BatteryVoltage", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle,
+                        "BatteryVoltage",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
+                    )
                 )
             if "odometer" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "odometer", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle, "odometer", True, _connectedcarsclient, _coordinator
+                    )
                 )
             if "fuelPercentage" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "fuelPercentage", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle,
+                        "fuelPercentage",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
+                    )
                 )
             if "fuelLevel" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "fuelLevel", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle, "fuelLevel", True, _connectedcarsclient, _coordinator
+                    )
                 )
             if "fuelEconomy" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "fuel economy", False, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle,
+                        "fuel economy",
+                        False,
+                        _connectedcarsclient,
+                        _coordinator,
+                    )
+                )
+            if (
+                "refuelEvents" in vehicle["has"]
+                and "fuelLevel" in vehicle["has"]
+                and "odometer" in vehicle["has"]
+            ):
+                sensors.append(
+                    MinVwEntity(
+                        vehicle,
+                        "average fuel economy",
+                        False,
+                        _connectedcarsclient,
+                        _coordinator,
+                    )
                 )
             if "NextServicePredicted" in vehicle["has"]:
                 sensors.append(
                     MinVwEntity(
-                        vehicle, "NextServicePredicted", False, _connectedcarsclient
+                        vehicle,
+                        "NextServicePredicted",
+                        False,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
             if "EVchargePercentage" in vehicle["has"]:
                 sensors.append(
                     MinVwEntity(
-                        vehicle, "EVchargePercentage", True, _connectedcarsclient
+                        vehicle,
+                        "EVchargePercentage",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
             if "EVHVBattTemp" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "EVHVBattTemp", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle,
+                        "EVHVBattTemp",
+                        True,
+                        _connectedcarsclient,
+                        _coordinator,
+                    )
                 )
             if "RangeTotal" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "Range", False, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle, "Range", False, _connectedcarsclient, _coordinator
+                    )
                 )
             if "Speed" in vehicle["has"]:
                 sensors.append(
-                    MinVwEntity(vehicle, "Speed", True, _connectedcarsclient)
+                    MinVwEntity(
+                        vehicle, "Speed", True, _connectedcarsclient, _coordinator
+                    )
                 )
-            if "totalTripStatistics" in vehicle["has"]:
+            if "lastTelemetry" in vehicle["has"]:
                 sensors.append(
                     MinVwEntity(
-                        vehicle, "mileage latest year", False, _connectedcarsclient
+                        vehicle,
+                        "last telemetry",
+                        False,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
-                sensors.append(
+            if "totalTripStatistics" in vehicle["has"]:
+                sensors_update_later.extend(
                     MinVwEntity(
-                        vehicle, "mileage latest month", False, _connectedcarsclient
+                        vehicle, item, False, _connectedcarsclient, _coordinator
                     )
+                    for item in MILEAGE_ITEMS
                 )
             if (
                 "refuelEvents" in vehicle["has"]
@@ -117,7 +210,11 @@ async def async_setup_entry(
             ):
                 sensors_update_later.append(
                     MinVwEntityRestore(
-                        vehicle, "mileage since refuel", False, _connectedcarsclient
+                        vehicle,
+                        "mileage since refuel",
+                        False,
+                        _connectedcarsclient,
+                        _coordinator,
                     )
                 )
         async_add_entities(sensors, update_before_add=True)
@@ -145,14 +242,28 @@ async def async_setup_entry(
                 device_registry.async_remove_device(device_entry.id)
 
 
-class MinVwEntity(SensorEntity):
+class MinVwEntity(CoordinatorEntity, SensorEntity):
     """Representation of a Sensor."""
 
     def __init__(
-        self, vehicle, itemName, entity_registry_enabled_default, connectedcarsclient
+        self,
+        vehicle,
+        itemName,
+        entity_registry_enabled_default,
+        connectedcarsclient,
+        coordinator,
     ) -> None:
         """Initialize the sensor."""
+        # Updated only when the vehicle fields read by the sensor change.
+        # Sensors without such fields are updated every time.
+        fields = ITEM_FIELDS.get(itemName, ())
+        super().__init__(
+            coordinator,
+            frozenset((vehicle["id"], field) for field in fields) if fields else None,
+        )
         self._state = None
+        self._update_task = None
+        self._update_pending = False
         self._data_date = None
         self._unit = None
         self._vehicle = vehicle
@@ -210,11 +321,7 @@ class MinVwEntity(SensorEntity):
             self._unit = UnitOfSpeed.KILOMETERS_PER_HOUR
             self._icon = "mdi:speedometer"
             self._device_class = SensorDeviceClass.SPEED
-        elif self._itemName == "mileage latest year":
-            self._unit = UnitOfLength.KILOMETERS
-            self._icon = "mdi:counter"
-            self._device_class = SensorDeviceClass.DISTANCE
-        elif self._itemName == "mileage latest month":
+        elif self._itemName in MILEAGE_ITEMS:
             self._unit = UnitOfLength.KILOMETERS
             self._icon = "mdi:counter"
             self._device_class = SensorDeviceClass.DISTANCE
@@ -222,7 +329,10 @@ class MinVwEntity(SensorEntity):
             self._unit = UnitOfLength.KILOMETERS
             self._icon = "mdi:counter"
             self._device_class = SensorDeviceClass.DISTANCE
-        elif self._itemName == "fuel economy":
+        elif self._itemName == "last telemetry":
+            self._icon = "mdi:clock-check-outline"
+            self._device_class = SensorDeviceClass.TIMESTAMP
+        elif self._itemName in ("fuel economy", "average fuel economy"):
             self._unit = "km/l"
             self._icon = "mdi:gas-station-outline"
             self._suggested_display_precision = 1
@@ -276,7 +386,7 @@ class MinVwEntity(SensorEntity):
     @property
     def available(self):
         """Availability."""
-        return self._state is not None
+        return super().available and self._state is not None
 
     @property
     def device_class(self):
@@ -307,94 +417,159 @@ class MinVwEntity(SensorEntity):
         """Return the suggested_display_precision."""
         return self._suggested_display_precision
 
+    async def async_added_to_hass(self) -> None:
+        """Request the vehicle fields of this sensor."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_request_fields(ITEM_FIELDS.get(self._itemName, ()))
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data pushed from the coordinator."""
+        if self._itemName in API_ITEMS:
+            self._async_schedule_update()
+            return
+        self._update_state()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_schedule_update(self) -> None:
+        """Update from the API in the background, one update at a time."""
+        if self._update_task is not None and not self._update_task.done():
+            self._update_pending = True
+            return
+        self._update_task = self.hass.async_create_background_task(
+            self._async_update_and_write(), f"{DOMAIN} update {self._unique_id}"
+        )
+
+    async def _async_update_and_write(self):
+        """Update state relying on additional API requests and write it.
+
+        Coordinator updates arriving meanwhile are handled by one more update.
+        """
+        self._update_pending = True
+        while self._update_pending:
+            self._update_pending = False
+            await self.async_update()
+            self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a running update."""
+        await super().async_will_remove_from_hass()
+        if self._update_task is not None:
+            self._update_task.cancel()
+
     async def async_update(self):
         """Fetch new state data for the sensor.
 
         This is the only method that should fetch new data for Home Assistant.
         """
-        # _LOGGER.debug(f"Setting status for {self._name}")
+        if self._itemName in API_ITEMS:
+            await self._async_update_from_api()
+        else:
+            self._update_state()
+
+    def _update_state(self):
+        """Update state from the most recently read vehicle data."""
+        vehicle = self._connectedcarsclient.get_cached_vehicle_state(
+            self._vehicle["id"]
+        )
+        if vehicle is None:
+            self._state = None
+            return
 
         if self._itemName == "outdoorTemperature":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["outdoorTemperatures", 0, "celsius"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["outdoorTemperatures", 0, "time"]
-            )
+            self._state = vehicle.outdoor_temperature
+            self._updated = vehicle.outdoor_temperature_time
         if self._itemName == "BatteryVoltage":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["latestBatteryVoltage", "voltage"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["latestBatteryVoltage", "time"]
-            )
+            self._state = vehicle.battery_voltage
+            self._updated = vehicle.battery_voltage_time
         if self._itemName == "fuelPercentage":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["fuelPercentage", "percent"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["fuelPercentage", "time"]
-            )
+            self._state = vehicle.fuel_percentage
+            self._updated = vehicle.fuel_percentage_time
         if self._itemName == "fuelLevel":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["fuelLevel", "liter"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["fuelLevel", "time"]
-            )
+            self._state = vehicle.fuel_level
+            self._updated = vehicle.fuel_level_time
         if self._itemName == "odometer":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["odometer", "odometer"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["odometer", "time"]
-            )
+            self._state = vehicle.odometer
+            self._updated = vehicle.odometer_time
         if self._itemName == "NextServicePredicted":
-            self._state = (
-                await self._connectedcarsclient.get_next_service_data_predicted(
-                    self._vehicle["id"]
-                )
-            )
+            self._state = vehicle.next_service_predicted
         if self._itemName == "Speed":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["position", "speed"]
-            )
-            self._dict["Direction"] = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["position", "direction"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["position", "time"]
-            )
-        if self._itemName == "mileage latest year" and (
-            self._data_date is None
-            or datetime.now(UTC) >= self._data_date + timedelta(hours=1)
-        ):
-            (
-                self._state,
-                self._dict,
-            ) = await self._connectedcarsclient.get_latest_years_mileage(
-                self._vehicle["id"], False
-            )
+            self._state = vehicle.speed
+            self._dict["Direction"] = vehicle.direction
+            self._updated = vehicle.position_time
+        if self._itemName == "fuel economy":
+            self._state = vehicle.fuel_economy
+        if self._itemName == "average fuel economy":
+            # Rolling over the latest tanks, calculated locally from refuel
+            # events, fuel level and odometer
+            statistics = self._connectedcarsclient.get_fuel_economy(self._vehicle["id"])
+            if statistics is None:
+                self._state = None
+                self._dict = {}
+            else:
+                self._state = statistics["rolling"]
+                self._dict = {
+                    "Current tank": statistics["current_tank"],
+                    "Last tank": statistics["last_tank"],
+                    "Lifetime": statistics["lifetime"],
+                    "Tanks": statistics["tanks"],
+                    "Distance": statistics["distance"],
+                    "Fuel used": statistics["liters"],
+                }
+
+        # EV
+        if self._itemName == "EVchargePercentage":
+            self._state = vehicle.charge_percentage
+            self._updated = vehicle.charge_percentage_time
+
             if self._state is not None:
-                self._data_date = datetime.now(UTC)
-        if self._itemName == "mileage latest month" and (
+                batlevel = round(self._state / 10) * 10
+                if batlevel == 100:
+                    self._icon = "mdi:battery"
+                elif batlevel == 0:
+                    self._icon = "mdi:battery-outline"
+                else:
+                    self._icon = f"mdi:battery-{batlevel}"
+        if self._itemName == "EVHVBattTemp":
+            self._state = vehicle.hv_battery_temperature
+            self._updated = vehicle.hv_battery_temperature_time
+        if self._itemName == "Range":
+            self._state = vehicle.range_km
+            self._updated = vehicle.range_time
+        if self._itemName == "last telemetry":
+            # Latest measurement of any field, and of each field as attribute,
+            # so automations can find stale fields from their age
+            times = self._connectedcarsclient.get_field_times(self._vehicle["id"])
+            self._state = max(times.values()).isoformat() if times else None
+            self._dict = {
+                field: time.isoformat() for field, time in sorted(times.items())
+            }
+
+    async def _async_update_from_api(self):
+        """Update state of sensors relying on additional API requests."""
+        if self._itemName in MILEAGE_ITEMS and (
             self._data_date is None
             or datetime.now(UTC) >= self._data_date + timedelta(hours=1)
         ):
+            # Statistics of all windows and vehicles are requested together
             (
                 self._state,
                 self._dict,
-            ) = await self._connectedcarsclient.get_latest_years_mileage(
-                self._vehicle["id"], True
+            ) = await self._connectedcarsclient.get_mileage(
+                self._vehicle["id"], MILEAGE_ITEMS[self._itemName]
             )
             if self._state is not None:
                 self._data_date = datetime.now(UTC)
         if self._itemName == "mileage since refuel":
             self._state = None
 
-            refuel_event_time = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["refuelEvents", 0, "time"]
+            vehicle = self._connectedcarsclient.get_cached_vehicle_state(
+                self._vehicle["id"]
             )
+            refuel_event_time = vehicle.refuel_time if vehicle is not None else None
             valid_date = is_date_valid(refuel_event_time)
             if valid_date:
                 # Has refuel timestamp changed?
@@ -409,25 +584,18 @@ class MinVwEntity(SensorEntity):
 
                 # Do we have odometer value corresponding to refuel timestamp?
                 if "Odometer" not in self._dict or self._dict["Odometer"] is None:
-                    trip = await self._connectedcarsclient.get_trip_at_time(
+                    odometer = await self._connectedcarsclient.get_odometer_at_time(
                         self._vehicle["id"], refuel_event_time
                     )
-                    if (
-                        trip is not None
-                        and "startOdometer" in trip
-                        and trip["startOdometer"] is not None
-                    ):
+                    if odometer is not None:
                         _LOGGER.debug(
-                            "Got odometer value at refuel event: %s",
-                            trip["startOdometer"],
+                            "Got odometer value at refuel event: %s", odometer
                         )
-                        self._dict["Odometer"] = trip["startOdometer"]
+                        self._dict["Odometer"] = odometer
 
             # Subtract refuel odometer from current odometer
             if "Odometer" in self._dict and self._dict["Odometer"] is not None:
-                odometer_current = await self._connectedcarsclient.get_value(
-                    self._vehicle["id"], ["odometer", "odometer"]
-                )
+                odometer_current = vehicle.odometer if vehicle is not None else None
                 if odometer_current is not None:
                     distance_since_refuel = odometer_current - self._dict["Odometer"]
                     if distance_since_refuel >= 0:
@@ -471,45 +639,6 @@ class MinVwEntity(SensorEntity):
             #     if self._state is not None:
             #         self._data_date = datetime.utcnow()
 
-        if self._itemName == "fuel economy":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["fuelEconomy"]
-            )
-            # if fuelEconomy is not None:
-            #     fuelEconomy = round(fuelEconomy, 1)
-            # self._state = fuelEconomy
-
-        # EV
-        if self._itemName == "EVchargePercentage":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["chargePercentage", "pct"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["chargePercentage", "time"]
-            )
-
-            batlevel = round(self._state / 10) * 10
-            if batlevel == 100:
-                self._icon = "mdi:battery"
-            elif batlevel == 0:
-                self._icon = "mdi:battery-outline"
-            else:
-                self._icon = f"mdi:battery-{batlevel}"
-        if self._itemName == "EVHVBattTemp":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["highVoltageBatteryTemperature", "celsius"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["highVoltageBatteryTemperature", "time"]
-            )
-        if self._itemName == "Range":
-            self._state = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["rangeTotalKm", "km"]
-            )
-            self._updated = await self._connectedcarsclient.get_value(
-                self._vehicle["id"], ["rangeTotalKm", "time"]
-            )
-
 
 def is_date_valid(date) -> bool:
     """Check date validity."""
@@ -564,6 +693,11 @@ class MinVwEntityRestore(MinVwEntity, RestoreSensor):
                     self._dict[key] = last_state.attributes[key]
             _LOGGER.debug("State: %s, Attributes: %s", last_state.state, self._dict)
 
+        if self._itemName in API_ITEMS:
+            # The update may wait for the initial trip sync, so do not hold up
+            # platform setup with it
+            self._async_schedule_update()
+            return
         await MinVwEntity.async_update(self)
         self.async_write_ha_state()
 
@@ -0,0 +1,241 @@
+"""Long-term statistics backfill of connectedcars.io vehicles.
+
+Recorder models used here need a recent Home Assistant. They are imported
+when the service is called, so the integration still loads without them.
+"""
+
+from datetime import UTC, datetime, timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant import core
+from homeassistant.const import UnitOfLength
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import slugify
+from homeassistant.util.unit_conversion import DistanceConverter
+
+from .const import DOMAIN
+from .minvw.freshness import parse_time
+from .minvw.transport import ApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL_STATISTICS = "backfill_statistics"
+ATTR_DAYS = "days"
+DEFAULT_BACKFILL_DAYS = 365
+# Stored statistics are first looked up this far back, then 4 times further
+LAST_STATISTICS_LOOKBACK = timedelta(days=7)
+
+BACKFILL_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DAYS, default=DEFAULT_BACKFILL_DAYS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3650)
+        )
+    }
+)
+
+
+def _statistic_id(vehicle, kind) -> str:
+    """Get id of an external statistic of a vehicle."""
+    return f"{DOMAIN}:{slugify(vehicle['vin'])}_{kind}"
+
+
+def _metadata(vehicle, kind, name):
+    """Get metadata of a distance statistic of a vehicle."""
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder.models import (
+        StatisticMeanType,
+        StatisticMetaData,
+    )
+
+    return StatisticMetaData(
+        mean_type=StatisticMeanType.NONE,
+        has_sum=True,
+        name=f"{vehicle['make']} {vehicle['model']} {name}",
+        source=DOMAIN,
+        statistic_id=_statistic_id(vehicle, kind),
+        unit_class=DistanceConverter.UNIT_CLASS,
+        unit_of_measurement=UnitOfLength.KILOMETERS,
+    )
+
+
+def _trip_hour(trip) -> datetime | None:
+    """Get the hour a trip ended in, None if it has not ended."""
+    end = parse_time(trip["endTime"]) if trip.get("endTime") else None
+    if end is None:
+        return None
+    return end.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+
+
+def hourly_statistics(trips, last_odometer=None, last_mileage=None):
+    """Aggregate trips to hourly odometer and mileage statistics.
+
+    Trips count in the hour they ended. The odometer state is the latest
+    odometer of the hour, and the mileage state the mileage driven in the
+    hour. Their sums continue from last_odometer and last_mileage, the
+    statistics stored for the last hour before the trips. Without them the
+    sums start at 0 at the first trip.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder.models import StatisticData
+
+    hours = {}
+    first_odometer = None
+    for trip in sorted(trips, key=lambda trip: trip.get("endTime") or ""):
+        hour = _trip_hour(trip)
+        if hour is None:
+            continue
+        odometer, mileage = hours.get(hour, (None, 0.0))
+        if trip.get("endOdometer") is not None:
+            odometer = trip["endOdometer"]
+            if first_odometer is None:
+                first_odometer = trip.get("startOdometer") or odometer
+        hours[hour] = (odometer, mileage + (trip.get("mileage") or 0.0))
+
+    # The odometer sum is the distance since the odometer was at this value
+    odometer_zero = first_odometer
+    if (
+        last_odometer is not None
+        and last_odometer.get("state") is not None
+        and last_odometer.get("sum") is not None
+    ):
+        odometer_zero = last_odometer["state"] - last_odometer["sum"]
+    mileage_sum = 0.0
+    if last_mileage is not None and last_mileage.get("sum") is not None:
+        mileage_sum = last_mileage["sum"]
+
+    odometer_statistics = []
+    mileage_statistics = []
+    for hour, (odometer, mileage) in sorted(hours.items()):
+        if odometer is not None:
+            odometer_statistics.append(
+                StatisticData(start=hour, state=odometer, sum=odometer - odometer_zero)
+            )
+        mileage_sum += mileage
+        mileage_statistics.append(
+            StatisticData(start=hour, state=mileage, sum=mileage_sum)
+        )
+    return odometer_statistics, mileage_statistics
+
+
+async def _async_get_last_statistics_before(
+    hass: core.HomeAssistant, statistic_ids: set[str], time: datetime
+) -> dict:
+    """Get the last hourly statistics stored before a time, by statistic id.
+
+    Looks back from the time over a short period first and only further back
+    for statistics not found, so the rows read stay few.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder import get_instance
+
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder.statistics import (
+        statistics_during_period,
+    )
+
+    epoch = datetime.fromtimestamp(0, UTC)
+    last = {}
+    missing = set(statistic_ids)
+    end = time
+    lookback = LAST_STATISTICS_LOOKBACK
+    while missing and end > epoch:
+        start = max(time - lookback, epoch)
+        statistics = await get_instance(hass).async_add_executor_job(
+            statistics_during_period,
+            hass,
+            start,
+            end,
+            missing,
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        for statistic_id, rows in statistics.items():
+            if rows:
+                last[statistic_id] = rows[-1]
+                missing.discard(statistic_id)
+        end = start
+        lookback *= 4
+    return last
+
+
+async def async_backfill_statistics(
+    hass: core.HomeAssistant, connectedcarsclient, days: int
+) -> int:
+    """Import hourly statistics of the trips of all vehicles of a client.
+
+    Trips are requested in pages and imported in bulk as external
+    statistics, continuing the sums stored before them. Returns the number
+    of trips.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder.statistics import (
+        async_add_external_statistics,
+    )
+
+    first = datetime.now(UTC) - timedelta(days=days)
+    count = 0
+    for vehicle in await connectedcarsclient.get_vehicle_instances():
+        trips = await connectedcarsclient.backfill_trips(vehicle["id"], first)
+        count += len(trips)
+        hours = [hour for trip in trips if (hour := _trip_hour(trip)) is not None]
+        if not hours:
+            continue
+
+        odometer_id = _statistic_id(vehicle, "odometer")
+        mileage_id = _statistic_id(vehicle, "mileage")
+        last = await _async_get_last_statistics_before(
+            hass, {odometer_id, mileage_id}, min(hours)
+        )
+        odometer_statistics, mileage_statistics = hourly_statistics(
+            trips, last.get(odometer_id), last.get(mileage_id)
+        )
+        if odometer_statistics:
+            async_add_external_statistics(
+                hass, _metadata(vehicle, "odometer", "odometer"), odometer_statistics
+            )
+        if mileage_statistics:
+            async_add_external_statistics(
+                hass, _metadata(vehicle, "mileage", "mileage"), mileage_statistics
+            )
+        _LOGGER.debug(
+            "Imported %s hours of statistics of vehicle %s",
+            len(mileage_statistics),
+            vehicle["id"],
+        )
+    return count
+
+
+async def async_handle_backfill_statistics(call: core.ServiceCall):
+    """Backfill statistics of all vehicles of all entries."""
+    hass = call.hass
+    if "recorder" not in hass.config.components:
+        raise HomeAssistantError("The recorder is needed to backfill statistics")
+
+    days = call.data[ATTR_DAYS]
+    errors = []
+    for entry_id, data in hass.data.get(DOMAIN, {}).items():
+        try:
+            count = await async_backfill_statistics(
+                hass, data["connectedcarsclient"], days
+            )
+        except ApiError as err:
+            # Backfill the other entries before failing
+            _LOGGER.warning("Failed to request trips for %s: %s", entry_id, err)
+            errors.append(f"{entry_id}: {err}")
+            continue
+        except ImportError as err:
+            # Same for every entry
+            raise HomeAssistantError(
+                f"Backfilling statistics needs a newer Home Assistant: {err}"
+            ) from err
+        _LOGGER.info(
+            "Backfilled statistics of %s trips of the last %s days for %s",
+            count,
+            days,
+            entry_id,
+        )
+    if errors:
+        raise HomeAssistantError(f"Failed to request trips: {'; '.join(errors)}")
@@ -0,0 +1,177 @@
+"""Support for connectedcars.io / Min Volkswagen integration."""
+
+from datetime import timedelta
+import logging
+from pathlib import Path
+
+from homeassistant import config_entries, core
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .minvw import MinVW
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Renew the access token this long before it expires
+TOKEN_RENEW_MARGIN = timedelta(minutes=10)
+TOKEN_RENEW_RETRY = timedelta(minutes=1)
+
+# Vehicle data is written at most this often, and when Home Assistant stops
+VEHICLE_DATA_SAVE_DELAY = 900  # seconds
+
+
+def _token_store(hass: core.HomeAssistant, entry_id: str) -> Store:
+    """Get store of the access token of an entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.token")
+
+
+def _vehicle_data_store(hass: core.HomeAssistant, entry_id: str) -> Store:
+    """Get store of the last vehicle data of an entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.vehicle_data")
+
+
+def trip_store_path(hass: core.HomeAssistant, entry_id: str) -> str:
+    """Get path of the trip database of an entry."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry_id}.trips.db")
+
+
+async def async_remove_stores(hass: core.HomeAssistant, entry_id: str):
+    """Remove everything stored for an entry."""
+    await _token_store(hass, entry_id).async_remove()
+    await _vehicle_data_store(hass, entry_id).async_remove()
+    await hass.async_add_executor_job(
+        Path(trip_store_path(hass, entry_id)).unlink, True
+    )
+
+
+class AccessTokenStore:
+    """Persist the access token of an entry and renew it before it expires."""
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        entry: config_entries.ConfigEntry,
+        connectedcarsclient: MinVW,
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._connectedcarsclient = connectedcarsclient
+        self._store = _token_store(hass, entry.entry_id)
+        self._unsub_renew = None
+        self._remove_token_listener = None
+
+    async def async_load(self):
+        """Restore a stored access token and schedule its renewal."""
+        stored = await self._store.async_load()
+        if stored is not None:
+            expires = dt_util.parse_datetime(stored.get("expires") or "")
+            if stored.get("token") is not None and expires is not None:
+                _LOGGER.debug("Restored access token expiring %s", expires)
+                self._connectedcarsclient.set_access_token(stored["token"], expires)
+
+        self._remove_token_listener = self._connectedcarsclient.add_token_listener(
+            self._handle_new_token
+        )
+        self._schedule_renewal()
+
+    @callback
+    def async_unload(self):
+        """Stop renewing the access token."""
+        if self._unsub_renew is not None:
+            self._unsub_renew()
+            self._unsub_renew = None
+        if self._remove_token_listener is not None:
+            self._remove_token_listener()
+            self._remove_token_listener = None
+
+    @callback
+    def _handle_new_token(self, token, expires):
+        """Store a new access token and schedule its renewal."""
+        self._store.async_delay_save(
+            lambda: {"token": token, "expires": expires.isoformat()}
+        )
+        self._schedule_renewal()
+
+    @callback
+    def _schedule_renewal(self, when=None):
+        """Schedule renewal of the access token before it expires."""
+        if self._unsub_renew is not None:
+            self._unsub_renew()
+            self._unsub_renew = None
+
+        if when is None:
+            expires = self._connectedcarsclient.access_token_expires
+            if expires is None:
+                # Renewal is scheduled once the first token is received
+                return
+            when = expires - TOKEN_RENEW_MARGIN
+
+        self._unsub_renew = async_track_point_in_utc_time(
+            self._hass, self._async_renew, when
+        )
+
+    async def _async_renew(self, now):
+        """Renew the access token."""
+        self._unsub_renew = None
+        try:
+            await self._connectedcarsclient.renew_access_token()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Failed to renew access token: %s", err)
+
+        # Retry while the current token is still valid, after that a new token
+        # is requested by the next data request
+        expires = self._connectedcarsclient.access_token_expires
+        retry = dt_util.utcnow() + TOKEN_RENEW_RETRY
+        if self._unsub_renew is None and expires is not None and retry < expires:
+            self._schedule_renewal(retry)
+
+
+class VehicleDataStore:
+    """Persist the last good vehicle data of an entry for a warm start."""
+
+    def __init__(
+        self,
+        hass: core.HomeAssistant,
+        entry: config_entries.ConfigEntry,
+        connectedcarsclient: MinVW,
+    ) -> None:
+        """Initialize."""
+        self._connectedcarsclient = connectedcarsclient
+        self._store = _vehicle_data_store(hass, entry.entry_id)
+        self._save_pending = False
+
+    async def async_load(self):
+        """Restore stored vehicle data into the client, returns it or None."""
+        stored = await self._store.async_load()
+        if stored is None:
+            return None
+        data = self._connectedcarsclient.restore_vehicle_data(stored)
+        if data is not None:
+            _LOGGER.debug("Restored vehicle data")
+        return data
+
+    @callback
+    def async_schedule_save(self):
+        """Store the current vehicle data after a successful refresh.
+
+        A pending write is not postponed, it stores the data current by then.
+        """
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._export, VEHICLE_DATA_SAVE_DELAY)
+
+    async def async_save(self):
+        """Store the current vehicle data right away."""
+        await self._store.async_save(self._export())
+
+    @callback
+    def _export(self):
+        """Get the current vehicle data for storage."""
+        self._save_pending = False
+        return self._connectedcarsclient.export_vehicle_data()